@@ -7,6 +7,26 @@
 
 import os
 import re
+from operator import itemgetter
+
+
+# 统计字段（与数据表列同名，顺序即SQL参数顺序）
+BOOK_STAT_COLUMNS = (
+    'char_types', 'char_types_in_1500', 'char_types_out_1500',
+    'coverage_500', 'coverage_1000', 'coverage_1500',
+    'avg_order_95', 'avg_order_99',
+    'chars_95', 'chars_99',
+    'chars_95_in_1500', 'chars_95_out_1500',
+    'chars_99_in_1500', 'chars_99_out_1500',
+    'difficulty_score', 'star_level',
+    'file_name', 'total_chars',
+    'rare_char_types', 'rare_char_ratio',
+    'tool_version',
+)
+
+# 【批量优化】数据字典 → SQL参数元组，itemgetter在C层一次取出全部字段
+_insert_values = itemgetter('book_name', 'author', *BOOK_STAT_COLUMNS)
+_update_values = itemgetter(*BOOK_STAT_COLUMNS, 'book_name', 'author', 'author')
 
 
 def parse_book_info_from_filename(filename):
@@ -203,7 +223,8 @@ def check_db_connection(config):
             user=config['mysql']['user'],
             password=config['mysql']['password'],
             database=config['mysql']['database'],
-            charset=config['mysql']['charset']
+            charset=config['mysql']['charset'],
+            autocommit=False  # 显式关闭自动提交：批量写入由调用方统一commit
         )
         return True, conn
     except ImportError:
@@ -428,6 +449,8 @@ def load_existing_books(conn):
 
     Returns:
         dict: {(book_name, author): book_id} 已存在书籍的映射
+              查重用 `key in existing_books`（哈希查找，O(1)）；
+              值为记录ID，供 batch_update_books 按ID合并更新
     """
     try:
         cursor = conn.cursor()
@@ -437,24 +460,23 @@ def load_existing_books(conn):
         cursor.close()
 
         # 构建映射：(书名, 作者) -> ID
-        existing_books = {}
-        for book_id, book_name, author in results:
-            key = (book_name, author if author else None)
-            existing_books[key] = book_id
-
-        return existing_books
+        return {
+            (book_name, author if author else None): book_id
+            for book_id, book_name, author in results
+        }
     except Exception as e:
         print(f"⚠ 加载已存在书籍列表失败: {e}")
         return {}
 
 
-def batch_insert_books(conn, data_list):
+def batch_insert_books(conn, data_list, log=print):
     """
     【批量优化】批量插入多条书籍记录
 
     Args:
         conn: 数据库连接
         data_list: 统计数据字典列表
+        log: 输出提示信息的函数（默认print；后台线程中可传入收集函数，由主线程统一打印）
 
     Returns:
         int: 成功插入的记录数
@@ -492,24 +514,9 @@ def batch_insert_books(conn, data_list):
         """
 
         # 准备批量数据
-        values_list = []
-        for data in data_list:
-            values = (
-                data['book_name'], data['author'], data['char_types'],
-                data['char_types_in_1500'], data['char_types_out_1500'],
-                data['coverage_500'], data['coverage_1000'], data['coverage_1500'],
-                data['avg_order_95'], data['avg_order_99'],
-                data['chars_95'], data['chars_99'],
-                data['chars_95_in_1500'], data['chars_95_out_1500'],
-                data['chars_99_in_1500'], data['chars_99_out_1500'],
-                data['difficulty_score'], data['star_level'],
-                data['file_name'], data['total_chars'],
-                data['rare_char_types'], data['rare_char_ratio'],
-                data['tool_version']
-            )
-            values_list.append(values)
-
-        # 批量执行
+        values_list = list(map(_insert_values, data_list))
+
+        # 批量执行（pymysql会把 INSERT ... VALUES 的executemany改写成一条多行INSERT）
         cursor.executemany(sql, values_list)
         conn.commit()
 
@@ -519,18 +526,45 @@ def batch_insert_books(conn, data_list):
         return affected_rows
 
     except Exception as e:
-        print(f"  ✗ 批量插入失败: {e}")
+        log(f"  ✗ 批量插入失败: {e}")
         conn.rollback()
         return 0
 
 
-def batch_update_books(conn, data_list):
+def build_case_update_sql(row_count):
+    """
+    【批量优化】生成按ID批量更新的单条 UPDATE ... CASE 语句
+
+    Args:
+        row_count: 要更新的记录数
+
+    Returns:
+        str: 参数顺序为：每个字段依次 (id, 值) × row_count，最后是 WHERE IN 的 row_count 个id
+    """
+    when_clauses = " ".join(["WHEN %s THEN %s"] * row_count)
+    set_clauses = ",\n            ".join(
+        f"{column} = CASE id {when_clauses} END" for column in BOOK_STAT_COLUMNS
+    )
+    id_placeholders = ", ".join(["%s"] * row_count)
+    return f"""
+        UPDATE book_difficulty SET
+            {set_clauses},
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id IN ({id_placeholders})
+        """
+
+
+def batch_update_books(conn, data_list, log=print):
     """
     【批量优化】批量更新多条书籍记录
 
+    带有 book_id 的记录（来自 existing_books 缓存）合并成一条 UPDATE ... CASE 语句，
+    一次往返即可完成；没有 book_id 的记录仍按书名+作者逐条匹配更新。
+
     Args:
         conn: 数据库连接
         data_list: 统计数据字典列表
+        log: 输出提示信息的函数（默认print；后台线程中可传入收集函数，由主线程统一打印）
 
     Returns:
         int: 成功更新的记录数
@@ -540,63 +574,67 @@ def batch_update_books(conn, data_list):
 
     try:
         cursor = conn.cursor()
+        affected_rows = 0
 
-        sql = """
-        UPDATE book_difficulty SET
-            char_types = %s,
-            char_types_in_1500 = %s,
-            char_types_out_1500 = %s,
-            coverage_500 = %s,
-            coverage_1000 = %s,
-            coverage_1500 = %s,
-            avg_order_95 = %s,
-            avg_order_99 = %s,
-            chars_95 = %s,
-            chars_99 = %s,
-            chars_95_in_1500 = %s,
-            chars_95_out_1500 = %s,
-            chars_99_in_1500 = %s,
-            chars_99_out_1500 = %s,
-            difficulty_score = %s,
-            star_level = %s,
-            file_name = %s,
-            total_chars = %s,
-            rare_char_types = %s,
-            rare_char_ratio = %s,
-            tool_version = %s,
-            updated_at = CURRENT_TIMESTAMP
-        WHERE book_name = %s AND (author = %s OR (author IS NULL AND %s IS NULL))
-        """
-
-        # 准备批量数据
-        values_list = []
+        # 同一本书在一批中出现多次时，以最后一次为准（与逐条更新的结果一致）
+        rows_by_id = {}
+        rows_without_id = []
         for data in data_list:
-            values = (
-                data['char_types'], data['char_types_in_1500'], data['char_types_out_1500'],
-                data['coverage_500'], data['coverage_1000'], data['coverage_1500'],
-                data['avg_order_95'], data['avg_order_99'],
-                data['chars_95'], data['chars_99'],
-                data['chars_95_in_1500'], data['chars_95_out_1500'],
-                data['chars_99_in_1500'], data['chars_99_out_1500'],
-                data['difficulty_score'], data['star_level'],
-                data['file_name'], data['total_chars'],
-                data['rare_char_types'], data['rare_char_ratio'],
-                data['tool_version'],
-                data['book_name'], data['author'], data['author']
-            )
-            values_list.append(values)
-
-        # 批量执行
-        cursor.executemany(sql, values_list)
+            if data.get('book_id') is not None:
+                rows_by_id[data['book_id']] = data
+            else:
+                rows_without_id.append(data)
+
+        if rows_by_id:
+            params = []
+            for column in BOOK_STAT_COLUMNS:
+                for book_id, data in rows_by_id.items():
+                    params.append(book_id)
+                    params.append(data[column])
+            params.extend(rows_by_id)
+
+            cursor.execute(build_case_update_sql(len(rows_by_id)), params)
+            affected_rows += cursor.rowcount
+
+        if rows_without_id:
+            sql = """
+            UPDATE book_difficulty SET
+                char_types = %s,
+                char_types_in_1500 = %s,
+                char_types_out_1500 = %s,
+                coverage_500 = %s,
+                coverage_1000 = %s,
+                coverage_1500 = %s,
+                avg_order_95 = %s,
+                avg_order_99 = %s,
+                chars_95 = %s,
+                chars_99 = %s,
+                chars_95_in_1500 = %s,
+                chars_95_out_1500 = %s,
+                chars_99_in_1500 = %s,
+                chars_99_out_1500 = %s,
+                difficulty_score = %s,
+                star_level = %s,
+                file_name = %s,
+                total_chars = %s,
+                rare_char_types = %s,
+                rare_char_ratio = %s,
+                tool_version = %s,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE book_name = %s AND (author = %s OR (author IS NULL AND %s IS NULL))
+            """
+
+            cursor.executemany(sql, list(map(_update_values, rows_without_id)))
+            affected_rows += cursor.rowcount
+
+        # 所有更新在同一事务中，只提交一次
         conn.commit()
-
-        affected_rows = cursor.rowcount
         cursor.close()
 
         return affected_rows
 
     except Exception as e:
-        print(f"  ✗ 批量更新失败: {e}")
+        log(f"  ✗ 批量更新失败: {e}")
         conn.rollback()
         return 0
 
@@ -615,7 +653,8 @@ def handle_database_upload(
         batch_mode: 是否批量模式（True=自动处理，False=允许用户确认）
         db_conn: 复用的数据库连接（批量模式用）
         db_config: 数据库配置（批量模式用）
-        existing_books: 【批量优化】已存在书籍的缓存 {(book_name, author): book_id}
+        existing_books: 【批量优化】已存在书籍的缓存 {(book_name, author): book_id}，
+                        由 load_existing_books() 一次性加载，查重只做字典查找，不再查询数据库
 
     Returns:
         批量模式: (success, conn, prepared_data, is_update)
@@ -632,7 +671,8 @@ def handle_database_upload(
         return False, None, None, False if batch_mode else (False, None)
 
     # 建立数据库连接（如果没有传入）
-    if db_conn is None:
+    # 批量模式带existing_books缓存时只准备数据、不执行SQL，无需连接（可在统计工作进程中调用）
+    if db_conn is None and not (batch_mode and existing_books is not None):
         success, db_conn = check_db_connection(db_config)
         if not success:
             return False, None, None, False if batch_mode else (False, None)
@@ -757,6 +797,9 @@ def handle_database_upload(
 
     # 【批量优化】批量模式：只准备数据，不执行SQL
     if batch_mode:
+        # 已存在的书带上ID，便于 batch_update_books 合并成一条按ID更新的语句
+        if book_exists and existing_books is not None:
+            data['book_id'] = existing_books.get(book_key)
         # 返回：(成功标记, 数据库连接, 准备好的数据, 是否更新)
         return True, db_conn if not need_close else None, data, book_exists
 
@@ -7,29 +7,50 @@ TOOL_VERSION = "1.3"
 
 import os
 import sys
+import atexit
 import io
-import unicodedata
-from collections import Counter
-
-# 尝试导入数据库上传模块（可选功能）
-try:
-    from db_uploader import handle_database_upload
-    DB_UPLOAD_AVAILABLE = True
-except ImportError:
-    DB_UPLOAD_AVAILABLE = False
+import codecs
+import contextlib
+import heapq
+import datetime
+import importlib.util
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque
+from itertools import accumulate, filterfalse, repeat
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from operator import attrgetter, itemgetter
+from statistics import fmean
+
+# 检查数据库上传模块是否存在（可选功能）
+# 【性能优化】只查找不导入，真正用到时再在调用处导入，缩短启动时间
+DB_UPLOAD_AVAILABLE = importlib.util.find_spec('db_uploader') is not None
 
 # 修复Windows控制台UTF-8显示问题（支持星星★等特殊符号）
+# 【性能优化】只有真正连着控制台时才加载ctypes切换代码页；输出流已是UTF-8时不再重新包装
+kernel32 = None
+
+
+def _is_utf8_stream(stream):
+    """判断输出流是否已经是UTF-8编码"""
+    return (getattr(stream, 'encoding', None) or '').lower().replace('-', '').startswith('utf8')
+
+
 if sys.platform == 'win32':
     try:
-        # 设置控制台代码页为UTF-8
-        import ctypes
-        kernel32 = ctypes.windll.kernel32
-        kernel32.SetConsoleOutputCP(65001)  # UTF-8
-        kernel32.SetConsoleCP(65001)
+        # 设置控制台代码页为UTF-8（输出重定向到文件时代码页无意义，跳过）
+        if sys.stdout.isatty():
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetConsoleOutputCP(65001)  # UTF-8
+            kernel32.SetConsoleCP(65001)
 
         # 重新包装stdout和stderr为UTF-8
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+        if not _is_utf8_stream(sys.stdout):
+            sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        if not _is_utf8_stream(sys.stderr):
+            sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
     except Exception as e:
         # 如果设置失败，尝试基本的UTF-8包装
         try:
@@ -116,6 +137,118 @@ ORDER_ACCELERATION = 0.7      # 字序加速系数（推荐1.5-3.0）
 # 输出文件夹名称
 OUTPUT_FOLDER = "字频统计结果"
 
+# 高频字覆盖率统计区间（前N字）
+# 【性能优化】固定区间定义为模块级常量，批量预计算与单文件统计共用一份
+STATS_RANGES = (10, 50, 100, 500, 1000, 1500, 2000, 3000, 5000)
+
+# 各评分维度的总权重（由上方配置推出，报告中决定是否输出整个维度）
+COVERAGE_WEIGHT = WEIGHT_COVERAGE_500 + WEIGHT_COVERAGE_1000 + WEIGHT_COVERAGE_1500
+CHARS_WEIGHT = WEIGHT_CHARS_95 + WEIGHT_CHARS_99
+ORDER_WEIGHT = WEIGHT_ORDER_95 + WEIGHT_ORDER_99
+TOTAL_WEIGHT = COVERAGE_WEIGHT + CHARS_WEIGHT + ORDER_WEIGHT + WEIGHT_CHAR_TYPES
+
+# 报告中"权重分配"说明只取决于上方配置，模块加载时生成一次（只列出非0权重）
+WEIGHT_ALLOCATION_TEXT = ' + '.join(
+    f"{name}{weight / TOTAL_WEIGHT * 100:.0f}%"
+    for name, weight in (('覆盖率', COVERAGE_WEIGHT), ('字数', CHARS_WEIGHT),
+                         ('字序', ORDER_WEIGHT), ('字种', WEIGHT_CHAR_TYPES))
+    if weight > 0
+) if TOTAL_WEIGHT > 0 else '未设置'
+
+# 统计字频时每次读取的字符数（流式分块读取）
+COUNT_CHUNK_SIZE = 1 << 20
+
+# 报告中的分隔线
+SEP_EQ = "=" * 80
+SEP_DASH = "-" * 80
+
+# 报告文件写缓冲大小（1MB），整份报告基本一次系统调用写完
+REPORT_WRITE_BUFFER = 1 << 20
+
+
+@dataclass(slots=True, frozen=True)
+class BookResult:
+    """
+    【性能优化】单本书的统计结果（process_file返回值，用于汇总报告和批量上传）
+
+    使用slots数据类代替字典：字段固定，内存占用更小，属性访问更快。
+    批量模式下summary_results会保存所有书籍的结果直到汇总报告生成。
+    """
+    filename: str
+    total_chars: int
+    char_type_count: int
+    extra_char_types: int            # 超出前1500的字种数
+    rare_type_count: int
+    rare_type_ratio: float
+    coverage_500: float
+    coverage_1000: float
+    coverage_1500: float
+    chars_95: int
+    chars_99: int
+    avg_order_95: float | None
+    avg_order_99: float | None
+    difficulty_score: float
+    stars: str
+    tool_version: str
+    upload_success: bool = False
+    db_conn: object = None           # 数据库连接（可能在process_file中被更新）
+    db_config: dict | None = None
+    db_prepared_data: dict | None = None  # 【批量优化】准备好的数据
+    db_is_update: bool = False       # 【批量优化】是否更新操作
+    display_name: str = field(init=False)  # 汇总表中显示的文件名（过长时截断）
+
+    def __post_init__(self):
+        # 创建结果时一次性算好截断后的显示名，汇总报告循环里直接使用
+        name = self.filename if len(self.filename) <= 30 else self.filename[:28] + '..'
+        object.__setattr__(self, 'display_name', name)
+
+
+# 【性能优化】单字显示宽度缓存：书名、表头中反复出现的字只查一次Unicode属性
+# 预先放入可打印ASCII（宽度均为1）
+_CHAR_WIDTH_CACHE = {chr(cp): 1 for cp in range(0x20, 0x7f)}
+
+# 【性能优化】常见宽字符区段（谚文字母、CJK部首/符号/假名、汉字及扩展区、彝文、谚文音节、
+# 兼容汉字、竖排/全角形式），其中的字East Asian Width均为W/F
+# 展平为 [起点, 终点+1, 起点, 终点+1, ...]，bisect_right结果为奇数即落在某个区段内
+_WIDE_RANGE_BOUNDS = tuple(bound for start, end in (
+    (0x1100, 0x115F), (0x2E80, 0x303E), (0x3041, 0x33FF), (0x3400, 0x4DBF),
+    (0x4E00, 0x9FFF), (0xA000, 0xA4CF), (0xAC00, 0xD7A3), (0xF900, 0xFAFF),
+    (0xFE30, 0xFE4F), (0xFF00, 0xFF60), (0xFFE0, 0xFFE6),
+    (0x20000, 0x2FFFD), (0x30000, 0x3FFFD),
+) for bound in (start, end + 1))
+
+
+# 【性能优化】匹配"既不是可打印ASCII、也不在上述宽字符区段"的字符
+# 搜不到时说明字符串只由ASCII（宽1）和宽字符（宽2）组成，可在C层直接算出总宽度
+_NOT_ASCII_OR_WIDE_RE = re.compile('[^\x20-\x7e' + ''.join(
+    f'{chr(_WIDE_RANGE_BOUNDS[i])}-{chr(_WIDE_RANGE_BOUNDS[i + 1] - 1)}'
+    for i in range(0, len(_WIDE_RANGE_BOUNDS), 2)
+) + ']')
+
+
+# 显示宽度为2的East Asian Width属性
+_WIDE_EAST_ASIAN_WIDTHS = frozenset(('F', 'W', 'A'))
+
+
+def _char_width(char, _cache_get=_CHAR_WIDTH_CACHE.get):
+    """单个字符的显示宽度（F/W/A为2，其余为1），结果缓存"""
+    # 【性能优化】缓存查询方法作为默认参数绑定为局部变量，逐字调用时少一次全局+属性查找
+    width = _cache_get(char)
+    if width is None and bisect_right(_WIDE_RANGE_BOUNDS, ord(char)) & 1:
+        # 常见宽字符区段：二分查表即可确定，无需查询Unicode属性
+        width = 2
+        _CHAR_WIDTH_CACHE[char] = width
+    elif width is None:
+        # 其余字符查询East Asian Width属性
+        # F=Fullwidth, W=Wide: 宽度为2
+        # A=Ambiguous: 在CJK环境中通常为2（包括★☆等符号）
+        # H=Halfwidth, Na=Narrow, N=Neutral: 宽度为1
+        # 【性能优化】只有不在常见宽字符区段的字符才走到这里，unicodedata在此按需导入，不拖慢启动
+        import unicodedata
+        width = 2 if unicodedata.east_asian_width(char) in _WIDE_EAST_ASIAN_WIDTHS else 1
+        _CHAR_WIDTH_CACHE[char] = width
+    return width
+
 
 def display_width(text):
     """
@@ -123,20 +256,52 @@ def display_width(text):
     - 全角/宽字符：宽度为2
     - 半角/窄字符：宽度为1
     """
-    width = 0
-    for char in text:
-        # 获取字符的East Asian Width属性
-        ea_width = unicodedata.east_asian_width(char)
+    # 【性能优化】纯ASCII字符串（分数、序号、英文表头等）宽度就是长度
+    # isascii()只检查字符串内部标志位，无需逐字调用east_asian_width
+    if text.isascii():
+        return len(text)
 
-        # F=Fullwidth, W=Wide: 宽度为2
-        # A=Ambiguous: 在CJK环境中通常为2（包括★☆等符号）
-        if ea_width in ('F', 'W', 'A'):
-            width += 2
-        # H=Halfwidth, Na=Narrow, N=Neutral: 宽度为1
-        else:
-            width += 1
+    # 常见的中文书名：只含ASCII和汉字等宽字符，一次正则扫描即可判定
+    # 宽度 = ASCII字数×1 + 其余字数×2；ASCII字数用encode忽略非ASCII后取长度
+    if _NOT_ASCII_OR_WIDE_RE.search(text) is None:
+        return 2 * len(text) - len(text.encode('ascii', 'ignore'))
+
+    return sum(map(_char_width, text))
 
-    return width
+
+def _truncate_to_width(text, target_width):
+    """
+    按显示宽度截断文本，返回 (截断后的文本, 实际显示宽度)
+
+    【性能优化】只找截断位置再切片一次，不逐字拼接字符串
+    """
+    char_width = _char_width
+    w = 0
+    for i, ch in enumerate(text):
+        ch_w = char_width(ch)
+        if w + ch_w > target_width:
+            return text[:i], w
+        w += ch_w
+    return text, w
+
+
+# 【性能优化】单元格格式化结果缓存（所有表格共用），按 (文本, 列宽) 缓存
+# 星级、分数、序号、表头等在翻页时反复出现，命中后无需再计算显示宽度；
+# 限制条数，交互会话中翻看大量书名时内存不会无限增长
+@lru_cache(maxsize=4096)
+def _format_cell_text(text, target_width):
+    """把文本截断或填充到固定显示宽度"""
+    current_width = display_width(text)
+
+    # 如果超出宽度，截断
+    if current_width > target_width:
+        if text.isascii():
+            return text[:target_width]
+        cell, _ = _truncate_to_width(text, target_width)
+        return cell
+
+    # 如果不足宽度，填充空格
+    return text + ' ' * (target_width - current_width)
 
 
 class TableFormatter:
@@ -152,6 +317,7 @@ class TableFormatter:
         self.headers = headers
         self.rows = []
         self.col_widths = col_widths
+        self.total_width = sum(col_widths) + len(col_widths) - 1  # 加上列间空格
 
     def add_row(self, *cols):
         """添加一行数据"""
@@ -162,30 +328,11 @@ class TableFormatter:
         """
         格式化单元格：截断或填充到固定宽度
         """
-        text = str(text)
-        current_width = display_width(text)
-
-        # 如果超出宽度，截断
-        if current_width > target_width:
-            truncated = ""
-            w = 0
-            for ch in text:
-                ea = unicodedata.east_asian_width(ch)
-                ch_w = 2 if ea in ('F', 'W', 'A') else 1
-                if w + ch_w > target_width:
-                    break
-                truncated += ch
-                w += ch_w
-            return truncated
-
-        # 如果不足宽度，填充空格
-        spaces_needed = target_width - current_width
-        return text + ' ' * spaces_needed
+        return _format_cell_text(str(text), target_width)
 
     def format(self):
         """格式化输出整个表格"""
         lines = []
-        total_width = sum(self.col_widths) + len(self.col_widths) - 1  # 加上列间空格
 
         # 表头
         header_parts = []
@@ -194,7 +341,7 @@ class TableFormatter:
         lines.append(' '.join(header_parts))
 
         # 分隔线
-        lines.append('-' * total_width)
+        lines.append('-' * self.total_width)
 
         # 数据行
         for row in self.rows:
@@ -225,18 +372,11 @@ def format_row(col1, col2, col3, col4, width1=6, width2=52, width3=22, width4=10
         current_width = display_width(col_str)
 
         # 如果超出宽度，截断
-        if current_width > target_width:
-            truncated = ""
-            w = 0
-            for ch in col_str:
-                ea = unicodedata.east_asian_width(ch)
-                ch_w = 2 if ea in ('F', 'W', 'A') else 1
-                if w + ch_w > target_width:
-                    break
-                truncated += ch
-                w += ch_w
-            col_str = truncated
-            current_width = w
+        if current_width > target_width and col_str.isascii():
+            col_str = col_str[:target_width]
+            current_width = target_width
+        elif current_width > target_width:
+            col_str, current_width = _truncate_to_width(col_str, target_width)
 
         # 计算需要填充多少空格
         spaces_needed = target_width - current_width
@@ -245,6 +385,27 @@ def format_row(col1, col2, col3, col4, width1=6, width2=52, width3=22, width4=10
     return ''.join(parts)
 
 
+def write_report_file(output_file, text):
+    """
+    【性能优化】把整份报告一次性编码并以二进制写入
+
+    跳过TextIOWrapper的加锁和增量编码；换行符按平台转换（与文本模式写入的结果一致）。
+    先写到临时文件再用os.replace原子替换：不用fsync，也不会留下写了一半的报告。
+
+    Args:
+        output_file: 输出文件路径
+        text: 报告全文（换行符为\n）
+    """
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    data = text.encode('utf-8')
+
+    tmp_file = output_file + '.tmp'
+    with open(tmp_file, 'wb', buffering=REPORT_WRITE_BUFFER) as f:
+        f.write(data)
+    os.replace(tmp_file, output_file)
+
+
 def ensure_output_folder():
     """确保输出文件夹存在，如果不存在则创建"""
     if not os.path.exists(OUTPUT_FOLDER):
@@ -272,11 +433,14 @@ def check_result_exists(file_path):
     if os.path.exists(output_folder):
         for existing_file in os.listdir(output_folder):
             # 检查文件名是否以书名开头，且包含"_字频统计_难度"
-            if existing_file.startswith(base_name) and '_字频统计_难度' in existing_file:
+            # （只认.txt，中途崩溃残留的.tmp临时文件不算已有结果）
+            if (existing_file.startswith(base_name) and '_字频统计_难度' in existing_file and
+                    existing_file.endswith('.txt')):
                 return True
     return False
 
 
+@lru_cache(maxsize=None)
 def get_resource_path(relative_path):
     """获取资源文件的绝对路径，支持打包后的exe"""
     try:
@@ -330,32 +494,51 @@ def find_txt_files(directory='books'):
         return []
 
 
+# 【性能优化】匹配连续的非汉字字符（汉字范围：基本区、扩展A区、扩展B-F区）
+# 用re.sub在C层一次删掉标点、空白、字母等，只留下汉字，代替逐字的Python范围比较
+_NON_CJK_RE = re.compile('[^\u4e00-\u9fff\u3400-\u4dbf\U00020000-\U0002ebef]+')
+
+
+def read_resource_bytes(relative_path):
+    """
+    【性能优化】一次性读取资源文件的原始字节
+
+    各加载函数需要依次尝试多种编码，先把文件读成bytes，
+    之后每种编码都直接在内存里解码，不必为每次尝试重新打开、读取文件。
+
+    Returns:
+        bytes: 文件内容；文件不存在时返回None
+    """
+    try:
+        with open(get_resource_path(relative_path), 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=None)
 def load_reference_chars():
     """
     加载参考字表（从前1500.txt）
     返回按顺序排列的1500个字的列表
+
+    【性能优化】结果缓存：同一次运行中多次统计只解析一次文件（调用方只读，不要修改）
     """
-    ref_file = get_resource_path('前1500.txt')
+    raw_data = read_resource_bytes('前1500.txt')
 
     # 尝试多种编码
     encodings = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312', 'gb18030']
 
-    for encoding in encodings:
+    for encoding in encodings if raw_data is not None else []:
         try:
-            with open(ref_file, 'r', encoding=encoding) as f:
-                content = f.read()
+            content = raw_data.decode(encoding)
 
             # 提取所有中文字符（包括扩展区，保持顺序）
-            chars = [
-                char for char in content
-                if ('\u4e00' <= char <= '\u9fff') or
-                   ('\u3400' <= char <= '\u4dbf') or
-                   ('\U00020000' <= char <= '\U0002ebef')
-            ]
+            chars = list(map(sys.intern, _NON_CJK_RE.sub('', content)))
             if len(chars) > 0:
                 print(f"  使用编码: {encoding}")
                 return chars
-        except (UnicodeDecodeError, UnicodeError, FileNotFoundError):
+        except (UnicodeDecodeError, UnicodeError):
             continue
 
     print(f"⚠ 警告：无法加载前1500.txt（尝试了{len(encodings)}种编码）")
@@ -363,27 +546,36 @@ def load_reference_chars():
     return None
 
 
+@lru_cache(maxsize=None)
 def load_dict_order():
-    """加载dict字序"""
+    """
+    加载dict字序
+
+    【性能优化】结果缓存：同一次运行中多次统计只解析一次文件（调用方只读，不要修改）
+    【性能优化】按字序插入，字典的迭代顺序就是字序，调用方无需再按序号排序
+    """
     dict_file = get_resource_path('dict_simple.txt')
+    raw_data = read_resource_bytes('dict_simple.txt')
 
     # 尝试多种编码
     encodings = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312', 'gb18030']
 
-    for encoding in encodings:
+    for encoding in encodings if raw_data is not None else []:
         try:
-            with open(dict_file, 'r', encoding=encoding) as f:
-                lines = f.readlines()
+            lines = raw_data.decode(encoding).splitlines()
 
             char_order = {}
             for idx, line in enumerate(lines, start=1):
                 char = line.strip()
                 if char:
+                    char = sys.intern(char)
+                    # 重复的字以最后一次出现为准，并移到末尾，保持迭代顺序与序号一致
+                    char_order.pop(char, None)
                     char_order[char] = idx
 
             print(f"  dict_simple.txt 使用编码: {encoding}")
             return char_order
-        except (UnicodeDecodeError, UnicodeError, FileNotFoundError):
+        except (UnicodeDecodeError, UnicodeError):
             continue
 
     print(f"加载dict字序失败（尝试了{len(encodings)}种编码）")
@@ -394,13 +586,34 @@ def load_dict_order():
 def detect_encoding(file_path):
     """自动检测文件编码，使用chardet库提高准确性"""
 
-    # 方法1: 尝试使用chardet库（如果已安装）
+    # 【性能优化】只打开一次文件：读取前100KB，后面所有检测方法共用这份数据
     try:
-        import chardet
-
-        # 读取文件的前100KB用于检测
         with open(file_path, 'rb') as f:
             raw_data = f.read(102400)  # 读取100KB
+    except:
+        return None
+
+    # 【性能优化】快速路径：BOM标记可直接确定编码
+    if raw_data.startswith(b'\xef\xbb\xbf'):
+        print("  编码检测: UTF-8-SIG (BOM)")
+        return 'utf-8-sig'
+    elif raw_data.startswith(b'\xff\xfe') or raw_data.startswith(b'\xfe\xff'):
+        print("  编码检测: UTF-16 (BOM)")
+        return 'utf-16'
+
+    # 【性能优化】快速路径：严格UTF-8校验（C层完成）
+    # 中文GBK文本几乎不可能恰好是合法UTF-8，校验通过即可跳过chardet的统计分析。
+    # 用增量解码器（final=False）：100KB截断处被切开的末尾多字节字符不算错误
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(raw_data, final=False)
+        print("  编码检测: UTF-8 (校验通过)")
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    # 方法1: 尝试使用chardet库（如果已安装）
+    try:
+        import chardet
 
         # 使用chardet检测编码
         result = chardet.detect(raw_data)
@@ -416,10 +629,9 @@ def detect_encoding(file_path):
             elif encoding == 'ascii':
                 encoding = 'utf-8'  # ASCII兼容UTF-8
 
-            # 验证检测结果是否正确
+            # 验证检测结果是否正确（直接解码已读入的开头部分，不再重新打开文件）
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    f.read(1024)
+                codecs.getincrementaldecoder(encoding)().decode(raw_data[:4096], final=False)
                 print(f"  编码检测: {encoding.upper()} (置信度: {confidence:.0%})")
                 return encoding
             except:
@@ -430,20 +642,7 @@ def detect_encoding(file_path):
     except Exception as e:
         print(f"  编码检测警告: {e}")
 
-    # 方法2: 备用方法 - 按优先级尝试常见编码
-    # 先读取文件的前100KB内容用于检测(增加到100KB,减少UTF-8字符被截断的概率)
-    try:
-        with open(file_path, 'rb') as f:
-            raw_data = f.read(102400)  # 增加到100KB
-    except:
-        return None
-
-    # 检测BOM标记
-    if raw_data.startswith(b'\xef\xbb\xbf'):
-        return 'utf-8-sig'
-    elif raw_data.startswith(b'\xff\xfe') or raw_data.startswith(b'\xfe\xff'):
-        return 'utf-16'
-
+    # 方法2: 备用方法 - 按优先级尝试常见编码（BOM和UTF-8已在上面处理）
     # 按优先级尝试解码
     encodings_priority = [
         ('utf-8', 0),
@@ -478,22 +677,15 @@ def detect_encoding(file_path):
 
     # 选择中文字符比例最高的编码
     if valid_encodings:
-        valid_encodings.sort(key=lambda x: x[1], reverse=True)
-        detected_encoding = valid_encodings[0][0]
-        print(f"  编码检测: {detected_encoding.upper()} (中文比例: {valid_encodings[0][1]:.1%})")
+        # 只需要比例最高的一个：max（比例相同时取先尝试的编码，与稳定排序后取第一个一致）
+        detected_encoding, best_ratio = max(valid_encodings, key=itemgetter(1))
+        print(f"  编码检测: {detected_encoding.upper()} (中文比例: {best_ratio:.1%})")
         return detected_encoding
 
     # 如果没有找到合适的编码，使用改进的试错法
     print("  编码检测: 使用试错法...")
     encodings = ['utf-8', 'gbk', 'gb2312', 'gb18030', 'big5', 'utf-16']
 
-    # 读取文件内容用于测试
-    try:
-        with open(file_path, 'rb') as f:
-            raw_data = f.read(102400)  # 读取100KB
-    except:
-        return None
-
     best_encoding = None
     best_score = 0
 
@@ -545,17 +737,15 @@ def count_chars(file_path):
         print(f"✓ 检测完成: {detected_encoding.upper()}")
 
     try:
+        # 提取中文字符并统计（基本汉字、扩展A区、扩展B-F区）
+        # 【性能优化】按1M字符分块流式读取，峰值内存与块大小相关而不是整本书；
+        # 文本模式下解码器会自动处理跨块的多字节字符，块边界不会切断汉字。
+        # 正则在C层删掉非汉字，Counter.update直接遍历剩下的字符串
+        # （按UTF-8字节用正则findall取汉字再计数更慢：每个字都要生成一个bytes对象）
+        char_counter = Counter()
         with open(file_path, 'r', encoding=detected_encoding, errors='ignore') as f:
-            content = f.read()
-
-        # 提取中文字符并统计
-        chinese_chars = [
-            char for char in content
-            if ('\u4e00' <= char <= '\u9fff') or  # 基本汉字
-               ('\u3400' <= char <= '\u4dbf') or  # 扩展A区
-               ('\U00020000' <= char <= '\U0002ebef')  # 扩展B-F区
-        ]
-        char_counter = Counter(chinese_chars)
+            for chunk in iter(partial(f.read, COUNT_CHUNK_SIZE), ''):
+                char_counter.update(_NON_CJK_RE.sub('', chunk))
 
         # 如果没有中文字符，直接返回
         if len(char_counter) == 0:
@@ -622,20 +812,23 @@ def load_common_chars(reference_chars=None, char_order=None):
     加载常用字表（前3500个字）
     - 前1500字：优先使用前1500.txt（如果可用）
     - 1500-3500字：使用dict_simple.txt按字序补充
+
+    【性能优化】返回frozenset，构建后不可变，可安全地在批量任务间共享
     """
     common_chars = set()
 
     if reference_chars and len(reference_chars) > 0:
         # 前1500字使用前1500.txt
-        common_chars = set(reference_chars)
+        # 【性能优化】只对字表哈希一次，常用字集合从它复制（复制集合不需要重新计算哈希）
+        reference_chars_set = frozenset(reference_chars)
+        common_chars = set(reference_chars_set)
 
         # 补充1500-3500字（从dict_simple.txt，按字序，排除前1500）
-        reference_chars_set = set(reference_chars)
         remaining_needed = 3500 - len(reference_chars)
 
         if char_order and remaining_needed > 0:
             added_count = 0
-            for char, order in sorted(char_order.items(), key=lambda x: x[1]):
+            for char in char_order:  # char_order按字序插入，无需排序
                 if char not in reference_chars_set:
                     common_chars.add(char)
                     added_count += 1
@@ -643,27 +836,33 @@ def load_common_chars(reference_chars=None, char_order=None):
                         break
     else:
         # 回退方案：从dict_simple.txt读取前3500个字
-        dict_file = get_resource_path('dict_simple.txt')
+        # 【性能优化】文件只读一次，各编码在内存中解码，取前3500行
+        raw_data = read_resource_bytes('dict_simple.txt')
         encodings = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312', 'gb18030']
 
-        for encoding in encodings:
+        for encoding in encodings if raw_data is not None else []:
             try:
-                with open(dict_file, 'r', encoding=encoding) as f:
-                    for i, line in enumerate(f, 1):
-                        if i > 3500:
-                            break
-                        char = line.strip()
-                        if char:
-                            common_chars.add(char)
+                lines = raw_data.decode(encoding).splitlines()[:3500]
+                common_chars = set(filter(None, map(str.strip, lines)))
 
                 if len(common_chars) > 0:
-                    return common_chars
-            except (UnicodeDecodeError, UnicodeError, FileNotFoundError):
+                    return frozenset(common_chars)
+            except (UnicodeDecodeError, UnicodeError):
                 continue
 
         print(f"加载常用字表失败（尝试了{len(encodings)}种编码）")
 
-    return common_chars
+    return frozenset(common_chars)
+
+
+@lru_cache(maxsize=None)
+def load_default_common_chars():
+    """
+    【性能优化】用默认参考字表和字序构建的常用字表，只构建一次
+
+    两个加载函数本身带缓存，交互模式下反复统计单本书时不必每次重建3500字的集合
+    """
+    return load_common_chars(load_reference_chars(), load_dict_order())
 
 
 def precompute_reference_sets(reference_chars, char_order, stats_ranges):
@@ -672,13 +871,13 @@ def precompute_reference_sets(reference_chars, char_order, stats_ranges):
 
     只计算一次，避免重复排序和遍历，大幅提升批量处理性能。
 
-    时间复杂度：O(m log m) 一次性成本
+    时间复杂度：O(n × m) 顺序遍历，不再排序
     vs 原先：O(n × m log m) n=stats_ranges数量
 
     Args:
         reference_chars: 前1500字列表（来自前1500.txt）
-        char_order: 字典序映射 {char: order}
-        stats_ranges: 需要计算的区间列表 [10, 50, 100, ...]
+        char_order: 字典序映射 {char: order}（迭代顺序即字序）
+        stats_ranges: 需要计算的区间列表（通常为 STATS_RANGES）
 
     Returns:
         dict: {区间: set(字符集合)} 例如 {500: set('的一是...')}
@@ -694,10 +893,8 @@ def precompute_reference_sets(reference_chars, char_order, stats_ranges):
             reference_sets_cache[top_n] = ref_set
         return reference_sets_cache
 
-    # 【关键优化】预排序char_order（只排序一次！）
-    # 避免每次calculate_coverage_stats都重复排序
-    sorted_char_order = sorted(char_order.items(), key=lambda x: x[1])
-    reference_chars_set = set(reference_chars)
+    # 【关键优化】char_order按字序插入（见load_dict_order），直接按迭代顺序取字，无需排序
+    reference_chars_set = frozenset(reference_chars)
 
     # 按区间从小到大处理（可以复用部分结果）
     for top_n in sorted(stats_ranges):
@@ -708,12 +905,11 @@ def precompute_reference_sets(reference_chars, char_order, stats_ranges):
             ref_top_chars = set(reference_chars[:top_n])
         else:
             # 前1500 + 从dict_simple.txt补充
-            ref_top_chars = set(reference_chars)  # 复制全部1500个
+            ref_top_chars = set(reference_chars_set)  # 复制全部1500个（从集合复制，无需重新哈希）
             remaining_needed = top_n - len(reference_chars)
             added_count = 0
 
-            # 使用预排序的结果，不再重复排序
-            for char, order in sorted_char_order:
+            for char in char_order:
                 if char not in reference_chars_set:
                     ref_top_chars.add(char)
                     added_count += 1
@@ -726,79 +922,167 @@ def precompute_reference_sets(reference_chars, char_order, stats_ranges):
     return reference_sets_cache
 
 
-def calculate_coverage_stats_optimized(top_n, reference_sets_cache, char_counter, total_chars):
+def precompute_reference_deltas(reference_sets_cache):
+    """
+    【性能优化】把嵌套的参考字表集合拆成各区间的"增量字"
+
+    各区间的参考字表是前缀关系（前10 ⊂ 前50 ⊂ ... ⊂ 前5000），
+    只需记录每个区间相对上一个区间新增的字。统计时按区间升序累加，
+    一次遍历就能得到所有区间的覆盖数，不再对每个区间重复遍历整个集合。
+
+    时间复杂度：每本书 O(max_n)（约5000次查找）
+    vs 原先：每本书 O(Σn)（10+50+...+5000 ≈ 13000次查找）
+
+    Args:
+        reference_sets_cache: precompute_reference_sets() 的返回值
+
+    Returns:
+        tuple: ((区间, 该区间字数, 新增字元组), ...) 按区间升序排列
+
+    线程安全性：返回值全部为不可变tuple，可安全共享
     """
-    【性能优化】使用预计算集合的覆盖率计算函数
+    reference_deltas = []
+    seen = frozenset()
+
+    for top_n in sorted(reference_sets_cache):
+        ref_top_chars = reference_sets_cache[top_n]
+        delta_chars = tuple(ref_top_chars - seen)
+        reference_deltas.append((top_n, len(ref_top_chars), delta_chars))
+        seen = ref_top_chars
+
+    return tuple(reference_deltas)
 
-    直接使用预计算的字符集合，避免每次都重新排序char_order。
 
-    时间复杂度：O(k) k=ref_top_chars大小
-    vs 原先：O(m log m + k) m=char_order大小
+def calculate_coverage_stats_all(reference_deltas, char_counter, total_chars):
+    """
+    【性能优化】一次遍历计算所有区间的覆盖率
 
     Args:
-        top_n: 区间大小（如500, 1000）
-        reference_sets_cache: 预计算的字符集合缓存
+        reference_deltas: precompute_reference_deltas() 的返回值
         char_counter: 当前文件的字频统计 Counter对象
         total_chars: 总字符数
 
     Returns:
-        dict: {'actual_n', 'coverage', 'avg_count', 'total_count'}
+        dict: {区间: {'actual_n', 'coverage', 'avg_count', 'total_count'}}
 
     线程安全性：不修改任何共享数据，仅读取
     """
-    ref_top_chars = reference_sets_cache.get(top_n, frozenset())
+    coverage_stats = {}
+    top_count = 0
 
-    # 【优化】使用sum和生成器表达式，比循环更高效
-    top_count = sum(char_counter.get(char, 0) for char in ref_top_chars)
+    for top_n, actual_n, delta_chars in reference_deltas:
+        # 累加本区间新增字的出现次数，即得前N字的累计次数
+        # map(dict.get) 在C层完成查找，避免Python层生成器的逐字开销
+        top_count += sum(map(char_counter.get, delta_chars, repeat(0)))
 
-    coverage = (top_count / total_chars) * 100 if total_chars > 0 else 0
-    avg_count = top_count / len(ref_top_chars) if len(ref_top_chars) > 0 else 0
+        coverage = (top_count / total_chars) * 100 if total_chars > 0 else 0
+        avg_count = top_count / actual_n if actual_n > 0 else 0
 
-    return {
-        'actual_n': len(ref_top_chars),
-        'coverage': coverage,
-        'avg_count': avg_count,
-        'total_count': top_count
-    }
+        coverage_stats[top_n] = {
+            'actual_n': actual_n,
+            'coverage': coverage,
+            'avg_count': avg_count,
+            'total_count': top_count
+        }
+
+    return coverage_stats
 
 
-def analyze_rare_chars(char_counter, common_chars):
+def calculate_cumulative_coverage(all_chars_by_freq, total_chars, thresholds=(50, 80, 90, 95, 99),
+                                  cumulative_counts=None):
+    """
+    【性能优化】计算累积覆盖率（覆盖X%的文本需要多少字）
+
+    先用 itertools.accumulate 在C层一次算出累计次数前缀和，
+    再对每个阈值二分查找第一个达到该覆盖率的位置，
+    不再在Python循环里逐字累加、逐阈值比较。
+
+    Args:
+        all_chars_by_freq: 按出现次数降序排列的 [(字, 次数), ...]
+        total_chars: 总字符数
+        thresholds: 覆盖率阈值（升序）
+        cumulative_counts: 已算好的累计次数前缀和（可选，未提供时现场计算）
+
+    Returns:
+        list: [(阈值, 所需字数, 实际覆盖率), ...]，末尾附带100%覆盖
+    """
+    cumulative_coverage = []
+    if cumulative_counts is None:
+        cumulative_counts = list(accumulate(map(itemgetter(1), all_chars_by_freq)))
+
+    def coverage_pct(cumulative_count):
+        return (cumulative_count / total_chars) * 100
+
+    for threshold in thresholds:
+        # 累计覆盖率单调递增，可直接二分
+        idx = bisect_left(cumulative_counts, threshold, key=coverage_pct)
+        if idx < len(cumulative_counts):
+            cumulative_coverage.append((threshold, idx + 1, coverage_pct(cumulative_counts[idx])))
+
+    # 100%覆盖就是所有字种数
+    cumulative_coverage.append((100, len(all_chars_by_freq), 100.0))
+
+    return cumulative_coverage
+
+
+def analyze_rare_chars(char_counter, common_chars, top_n=20, total_chars=None):
     """
     分析生僻字情况
+    total_chars: 总字符数（调用方已算出时直接传入，避免再对整个Counter求和）
     返回字典包含：
-    - rare_chars: 所有生僻字列表 [(字, 次数)]
+    - top_rare_chars: 出现次数最多的top_n个生僻字 [(字, 次数)]
     - rare_char_count: 生僻字出现总次数
     - rare_char_ratio: 生僻字占文本比例
     - rare_type_count: 生僻字字种数
     - rare_type_ratio: 生僻字字种占比
     """
-    rare_chars = []  # (字, 次数)
-    common_char_count = 0
-    rare_char_count = 0
-
-    for char, count in char_counter.items():
-        if char in common_chars:
-            common_char_count += count
-        else:
-            rare_char_count += count
-            rare_chars.append((char, count))
-
-    # 按出现次数降序排序
-    rare_chars.sort(key=lambda x: x[1], reverse=True)
-
-    total_chars = common_char_count + rare_char_count
+    # 【性能优化】filterfalse/map/zip 全部在C层迭代，不再逐字做Python分支
+    # （保持Counter原有顺序，次数相同的生僻字排序结果与之前一致）
+    rare_keys = list(filterfalse(common_chars.__contains__, char_counter))
+    rare_counts = list(map(char_counter.__getitem__, rare_keys))
+    rare_char_count = sum(rare_counts)
+
+    # 【性能优化】报告只展示出现最多的前top_n个，用堆取部分最大值，不必对全部生僻字排序
+    # （heapq.nlargest 与 sorted(..., reverse=True)[:n] 结果一致，次数相同时保持原有顺序）
+    top_rare_chars = heapq.nlargest(top_n, zip(rare_keys, rare_counts), key=itemgetter(1))
+
+    if total_chars is None:
+        total_chars = sum(char_counter.values())
     rare_char_ratio = rare_char_count / total_chars if total_chars > 0 else 0
-    rare_type_ratio = len(rare_chars) / len(char_counter) if len(char_counter) > 0 else 0
+    rare_type_ratio = len(rare_keys) / len(char_counter) if len(char_counter) > 0 else 0
 
     return {
-        'rare_chars': rare_chars,           # 所有生僻字列表
+        'top_rare_chars': top_rare_chars,   # 出现最多的生僻字列表
         'rare_char_count': rare_char_count, # 生僻字出现总次数
         'rare_char_ratio': rare_char_ratio, # 生僻字占文本比例
-        'rare_type_count': len(rare_chars), # 生僻字字种数
+        'rare_type_count': len(rare_keys),  # 生僻字字种数
         'rare_type_ratio': rare_type_ratio  # 生僻字字种占比
     }
 
 
+def _ascending_score(value, low, high, weight, acceleration=None):
+    """
+    区间评分（值越大越难）：≤low得0分，≥high得满分，中间按比例插值
+    acceleration不为None时对比例应用非线性加速
+    """
+    if value <= low:
+        return 0
+    if value >= high:
+        return weight
+    if acceleration is None:
+        return weight * (value - low) / (high - low)
+    return weight * (((value - low) / (high - low)) ** acceleration)
+
+
+def _descending_score(value, low, high, weight, acceleration):
+    """区间评分（值越大越简单）：≥high得0分，≤low得满分，中间按比例插值并加速"""
+    if value >= high:
+        return 0
+    if value <= low:
+        return weight
+    return weight * (((high - value) / (high - low)) ** acceleration)
+
+
 def calculate_difficulty_rating(char_counter, total_chars, coverage_stats, cumulative_coverage, avg_order_95, avg_order_99, extra_char_types):
     """
     计算书籍难度（⭐-⭐⭐⭐⭐⭐）
@@ -817,13 +1101,9 @@ def calculate_difficulty_rating(char_counter, total_chars, coverage_stats, cumul
     coverage_1500 = coverage_stats.get(1500, {}).get('coverage', 0)
 
     # 从cumulative_coverage获取95%和99%所需字数
-    chars_for_95 = 0
-    chars_for_99 = 0
-    for target_pct, char_count, _ in cumulative_coverage:
-        if target_pct == 95:
-            chars_for_95 = char_count
-        if target_pct == 99:
-            chars_for_99 = char_count
+    coverage_char_counts = {target_pct: char_count for target_pct, char_count, _ in cumulative_coverage}
+    chars_for_95 = coverage_char_counts.get(95, 0)
+    chars_for_99 = coverage_char_counts.get(99, 0)
 
     # 字种数
     char_type_count = len(char_counter)
@@ -839,86 +1119,39 @@ def calculate_difficulty_rating(char_counter, total_chars, coverage_stats, cumul
         score_1500 = WEIGHT_COVERAGE_1500 * (((100 - coverage_1500) / 100) ** COVERAGE_ACCELERATION)
     else:
         # 区间模式：使用配置的区间范围
-        if coverage_500 >= COVERAGE_500_MAX:
-            score_500 = 0
-        elif coverage_500 <= COVERAGE_500_MIN:
-            score_500 = WEIGHT_COVERAGE_500
-        else:
-            ratio = (COVERAGE_500_MAX - coverage_500) / (COVERAGE_500_MAX - COVERAGE_500_MIN)
-            score_500 = WEIGHT_COVERAGE_500 * (ratio ** COVERAGE_ACCELERATION)
-
-        if coverage_1000 >= COVERAGE_1000_MAX:
-            score_1000 = 0
-        elif coverage_1000 <= COVERAGE_1000_MIN:
-            score_1000 = WEIGHT_COVERAGE_1000
-        else:
-            ratio = (COVERAGE_1000_MAX - coverage_1000) / (COVERAGE_1000_MAX - COVERAGE_1000_MIN)
-            score_1000 = WEIGHT_COVERAGE_1000 * (ratio ** COVERAGE_ACCELERATION)
-
-        if coverage_1500 >= COVERAGE_1500_MAX:
-            score_1500 = 0
-        elif coverage_1500 <= COVERAGE_1500_MIN:
-            score_1500 = WEIGHT_COVERAGE_1500
-        else:
-            ratio = (COVERAGE_1500_MAX - coverage_1500) / (COVERAGE_1500_MAX - COVERAGE_1500_MIN)
-            score_1500 = WEIGHT_COVERAGE_1500 * (ratio ** COVERAGE_ACCELERATION)
-
-    # 4. 95%覆盖所需字数评分
-    if chars_for_95 <= CHARS_95_MIN:
-        score_95_chars = 0
-    elif chars_for_95 >= CHARS_95_MAX:
-        score_95_chars = WEIGHT_CHARS_95
-    else:
-        score_95_chars = WEIGHT_CHARS_95 * (chars_for_95 - CHARS_95_MIN) / (CHARS_95_MAX - CHARS_95_MIN)
-
-    # 5. 99%覆盖所需字数评分
-    if chars_for_99 <= CHARS_99_MIN:
-        score_99_chars = 0
-    elif chars_for_99 >= CHARS_99_MAX:
-        score_99_chars = WEIGHT_CHARS_99
-    else:
-        score_99_chars = WEIGHT_CHARS_99 * (chars_for_99 - CHARS_99_MIN) / (CHARS_99_MAX - CHARS_99_MIN)
-
-    # 6. 95%平均字序评分（应用非线性加速）
+        score_500 = _descending_score(coverage_500, COVERAGE_500_MIN, COVERAGE_500_MAX,
+                                      WEIGHT_COVERAGE_500, COVERAGE_ACCELERATION)
+        score_1000 = _descending_score(coverage_1000, COVERAGE_1000_MIN, COVERAGE_1000_MAX,
+                                       WEIGHT_COVERAGE_1000, COVERAGE_ACCELERATION)
+        score_1500 = _descending_score(coverage_1500, COVERAGE_1500_MIN, COVERAGE_1500_MAX,
+                                       WEIGHT_COVERAGE_1500, COVERAGE_ACCELERATION)
+
+    # 4-5. 95%/99%覆盖所需字数评分
+    score_95_chars = _ascending_score(chars_for_95, CHARS_95_MIN, CHARS_95_MAX, WEIGHT_CHARS_95)
+    score_99_chars = _ascending_score(chars_for_99, CHARS_99_MIN, CHARS_99_MAX, WEIGHT_CHARS_99)
+
+    # 6-7. 95%/99%平均字序评分（应用非线性加速，无数据时默认中等难度）
     if avg_order_95 is None:
-        score_95_order = WEIGHT_ORDER_95 / 2  # 默认中等难度
-    elif avg_order_95 <= ORDER_95_MIN:
-        score_95_order = 0
-    elif avg_order_95 >= ORDER_95_MAX:
-        score_95_order = WEIGHT_ORDER_95
+        score_95_order = WEIGHT_ORDER_95 / 2
     else:
-        ratio = (avg_order_95 - ORDER_95_MIN) / (ORDER_95_MAX - ORDER_95_MIN)
-        score_95_order = WEIGHT_ORDER_95 * (ratio ** ORDER_ACCELERATION)
-
-    # 7. 99%平均字序评分（应用非线性加速）
+        score_95_order = _ascending_score(avg_order_95, ORDER_95_MIN, ORDER_95_MAX,
+                                          WEIGHT_ORDER_95, ORDER_ACCELERATION)
     if avg_order_99 is None:
-        score_99_order = WEIGHT_ORDER_99 / 2  # 默认中等难度
-    elif avg_order_99 <= ORDER_99_MIN:
-        score_99_order = 0
-    elif avg_order_99 >= ORDER_99_MAX:
-        score_99_order = WEIGHT_ORDER_99
+        score_99_order = WEIGHT_ORDER_99 / 2
     else:
-        ratio = (avg_order_99 - ORDER_99_MIN) / (ORDER_99_MAX - ORDER_99_MIN)
-        score_99_order = WEIGHT_ORDER_99 * (ratio ** ORDER_ACCELERATION)
+        score_99_order = _ascending_score(avg_order_99, ORDER_99_MIN, ORDER_99_MAX,
+                                          WEIGHT_ORDER_99, ORDER_ACCELERATION)
 
     # 8. 字种数评分（使用传入的超出前1500.txt的字种数）
-    if extra_char_types <= CHAR_TYPES_MIN:
-        score_char_types = 0
-    elif extra_char_types >= CHAR_TYPES_MAX:
-        score_char_types = WEIGHT_CHAR_TYPES
-    else:
-        score_char_types = WEIGHT_CHAR_TYPES * (extra_char_types - CHAR_TYPES_MIN) / (CHAR_TYPES_MAX - CHAR_TYPES_MIN)
+    score_char_types = _ascending_score(extra_char_types, CHAR_TYPES_MIN, CHAR_TYPES_MAX, WEIGHT_CHAR_TYPES)
 
     # 综合难度分数（原始分数）
     raw_score = (score_500 + score_1000 + score_1500 +
                  score_95_chars + score_99_chars +
                  score_95_order + score_99_order + score_char_types)
 
-    # 计算总权重
-    total_weight = (WEIGHT_COVERAGE_500 + WEIGHT_COVERAGE_1000 + WEIGHT_COVERAGE_1500 +
-                   WEIGHT_CHARS_95 + WEIGHT_CHARS_99 +
-                   WEIGHT_ORDER_95 + WEIGHT_ORDER_99 +
-                   WEIGHT_CHAR_TYPES)
+    # 【性能优化】总权重由配置推出，模块加载时算好
+    total_weight = TOTAL_WEIGHT
 
     # 归一化到0-100（无论权重如何设置，最终都是0-100的标准分数）
     if total_weight > 0:
@@ -957,10 +1190,9 @@ def calculate_avg_char_order(chars_list, char_order):
 
     返回：平均序号（不在字典中的字不计入）
     """
-    orders = []
-    for char, _ in chars_list:
-        if char in char_order:
-            orders.append(char_order[char])
+    # 【性能优化】取字、查序号、剔除不在字典中的字全部由map/filter在C层完成
+    # （字典序号从1开始，filter(None, ...)只会去掉查不到的None）
+    orders = list(filter(None, map(char_order.get, map(itemgetter(0), chars_list))))
 
     if orders:
         return sum(orders) / len(orders)
@@ -987,8 +1219,27 @@ def print_main_menu():
     print("=" * 70)
 
 
+# 【性能优化】菜单各查询功能共用的数据库连接（首次使用时建立，程序退出时关闭）
+_DB_CONN = None
+
+
 def get_db_connection():
-    """获取数据库连接"""
+    """
+    获取数据库连接
+
+    【性能优化】复用同一个连接：再次进入查询功能时只ping一下（断线自动重连），
+    不必每次重新握手认证。连接关闭了自动提交，复用前先rollback结束上次的读事务，
+    以便看到之后新上传的数据。调用方不要关闭返回的连接。
+    """
+    global _DB_CONN
+    if _DB_CONN is not None:
+        try:
+            _DB_CONN.ping(reconnect=True)
+            _DB_CONN.rollback()
+            return _DB_CONN
+        except Exception:
+            _DB_CONN = None
+
     if not DB_UPLOAD_AVAILABLE:
         print("数据库功能不可用（未安装pymysql或db_uploader模块）")
         return None
@@ -1009,33 +1260,143 @@ def get_db_connection():
             print("数据库连接失败")
             return None
 
+        _DB_CONN = db_conn
         return db_conn
     except Exception as e:
         print(f"数据库连接错误: {e}")
         return None
 
 
+@atexit.register
+def _close_db_connection():
+    """程序退出时关闭共用的数据库连接"""
+    global _DB_CONN
+    if _DB_CONN is not None:
+        try:
+            _DB_CONN.close()
+        except Exception:
+            pass
+        _DB_CONN = None
+
+
+# 【性能优化】20级星级显示只有21种结果，预先生成查表
+# 第u级（每5分一级）：u//2 个实心星★，奇数级再加一个空心星☆；0级显示一个☆
+_STAR_DISPLAYS = tuple(("★" * (units // 2) + "☆" * (units % 2)) or "☆" for units in range(21))
+
+
 def difficulty_score_to_star_display(score):
     """将难度分数转换为星级显示（20级制：每5分一个空心星☆，每10分一个实心星★）"""
-    # 计算有多少个5分单位
+    # 计算有多少个5分单位，限制在0-20级后直接查表（≥100分为10个实心星）
     units = int(score / 5)
-    # 每2个单位合并成1个实心星，余数是空心星
-    full_stars = units // 2  # 实心星数量
-    half_star = units % 2    # 空心星数量（0或1）
+    return _STAR_DISPLAYS[min(max(units, 0), 20)]
+
+
+class PrefetchPageLoader:
+    """
+    【性能优化】分页查询加载器：用户查看当前页时，后台线程预取下一页
+
+    所有查询都交给同一个单线程执行器，同一连接上的查询天然串行，无需加锁；
+    主线程只等待结果。按"下一页"时通常已经取好，数据库往返与阅读时间重叠。
+    两条分页SQL在构造时拼好，所有页复用同一个游标。
 
-    # 最多10个实心星
-    full_stars = min(full_stars, 10)
+    【性能优化】顺序翻页使用游标分页（keyset）：以上一页末行的 (排序字段, id)
+    作为起点，用行值比较 (field, id) > (%s, %s) 走索引一次定位，
+    不必像 OFFSET 那样扫过前面所有行。跳页或起点字段为NULL时回退到 OFFSET。
 
-    # 构建星级字符串
-    result = "★" * full_stars
-    if half_star and full_stars < 10:  # 只有在未满10个实心星时才加空心星
-        result += "☆"
+    【性能优化】总条数不超过 BULK_LIMIT 时，第一次取页就把全部结果一次查回，
+    之后翻页、跳页都直接在内存中切片，不再访问数据库。
+    """
+    # 一次性全部查回的最大条数
+    BULK_LIMIT = 5000
 
-    # 如果什么都没有，至少显示一个空心星
-    if not result:
-        result = "☆"
+    def __init__(self, conn, select_fields, order_field, descending, page_size,
+                 where=None, params=(), key_index=3, total_count=None):
+        """
+        Args:
+            conn: 数据库连接
+            select_fields: SELECT 字段列表，第一列必须是 id
+            order_field: 排序字段（与 id 组成排序键）
+            descending: 是否倒序
+            page_size: 每页条数
+            where: 额外的筛选条件（可选）
+            params: 筛选条件的参数
+            key_index: 排序字段在结果行中的下标
+            total_count: 结果总条数（已知且不超过BULK_LIMIT时一次查回全部结果）
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        self.conn = conn
+        self.params = tuple(params)
+        self.page_size = page_size
+        self.key_index = key_index
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = {}      # {页码: Future}
+        self.page_ends = {}    # {页码: (排序字段值, id)}，只在工作线程中读写
+        self.cursor = None     # 所有页共用一个游标，只在工作线程中使用
+        self.bulk_count = total_count if total_count is not None and total_count <= self.BULK_LIMIT else None
+        self.all_rows = None   # 一次查回的全部结果，只在工作线程中读写
+
+        direction = "DESC" if descending else "ASC"
+        select = f"SELECT {select_fields} FROM book_difficulty"
+        order_by = f"ORDER BY {order_field} {direction}, id {direction}"
+
+        # 倒序时NULL排在最后，行值比较会漏掉它们，需要显式补上
+        if descending:
+            keyset = f"(({order_field}, id) < (%s, %s) OR {order_field} IS NULL)"
+        else:
+            keyset = f"({order_field}, id) > (%s, %s)"
+
+        if where:
+            self.offset_sql = f"{select} WHERE {where} {order_by} LIMIT %s OFFSET %s"
+            self.keyset_sql = f"{select} WHERE {where} AND {keyset} {order_by} LIMIT %s"
+        else:
+            self.offset_sql = f"{select} {order_by} LIMIT %s OFFSET %s"
+            self.keyset_sql = f"{select} WHERE {keyset} {order_by} LIMIT %s"
+
+    def _fetch(self, page):
+        if self.cursor is None:
+            self.cursor = self.conn.cursor()
+        cursor = self.cursor
+
+        if self.bulk_count is not None:
+            if self.all_rows is None:
+                cursor.execute(self.offset_sql, self.params + (self.bulk_count, 0))
+                self.all_rows = cursor.fetchall()
+            start = page * self.page_size
+            return self.all_rows[start:start + self.page_size]
+
+        previous_end = self.page_ends.get(page - 1)
+        if previous_end is not None:
+            cursor.execute(self.keyset_sql, self.params + previous_end + (self.page_size,))
+        else:
+            cursor.execute(self.offset_sql, self.params + (self.page_size, page * self.page_size))
+        results = cursor.fetchall()
 
-    return result
+        if results:
+            last_row = results[-1]
+            if last_row[self.key_index] is not None:
+                self.page_ends[page] = (last_row[self.key_index], last_row[0])
+        return results
+
+    def load(self, page):
+        """取某一页的数据（命中预取时直接返回）"""
+        future = self.pending.pop(page, None)
+        # 跳到其他页时，之前预取的结果作废
+        self.pending.clear()
+        if future is None:
+            future = self.executor.submit(self._fetch, page)
+        return future.result()
+
+    def prefetch(self, page):
+        """在后台预取某一页"""
+        if page not in self.pending:
+            self.pending[page] = self.executor.submit(self._fetch, page)
+
+    def close(self):
+        """等待进行中的查询结束（之后才能安全关闭连接）"""
+        self.executor.shutdown(wait=True)
+        if self.cursor is not None:
+            self.cursor.close()
+            self.cursor = None
 
 
 def feature_generic_ranking(field_name, field_display_name, title, asc_desc, desc_desc,
@@ -1062,6 +1423,7 @@ def feature_generic_ranking(field_name, field_display_name, title, asc_desc, des
         input("\n按回车键返回主菜单...")
         return
 
+    page_loader = None
     try:
         # 选择排序方式
         print("\n请选择排序方式：")
@@ -1077,7 +1439,6 @@ def feature_generic_ranking(field_name, field_display_name, title, asc_desc, des
             print("无效输入，请输入1或2")
 
         is_ascending = (order_choice == '1')
-        order_direction = "ASC" if is_ascending else "DESC"
 
         # 获取总记录数
         cursor = conn.cursor()
@@ -1095,25 +1456,29 @@ def feature_generic_ranking(field_name, field_display_name, title, asc_desc, des
         total_pages = (total_count + page_size - 1) // page_size
         current_page = 0
 
+        # 构建SQL查询
+        select_fields = f"id, book_name, author, {field_name}"
+        if show_difficulty:
+            select_fields += ", difficulty_score, star_level"
+
+        page_loader = PrefetchPageLoader(conn, select_fields, field_name, not is_ascending, page_size,
+                                         total_count=total_count)
+
+        # 根据是否显示难度调整表格列
+        if show_difficulty:
+            if field_name == 'difficulty_score':
+                headers = ['序号', '书名', '难度星级', field_display_name]
+                col_widths = [6, 48, 24, 10]
+            else:
+                headers = ['序号', '书名', field_display_name, '难度星级']
+                col_widths = [6, 40, 12, 24]
+        else:
+            headers = ['序号', '书名', field_display_name]
+            col_widths = [6, 52, 20]
+
         while True:
             # 加载当前页数据
-            cursor = conn.cursor()
-            offset = current_page * page_size
-
-            # 构建SQL查询
-            select_fields = f"id, book_name, author, {field_name}"
-            if show_difficulty:
-                select_fields += ", difficulty_score, star_level"
-
-            sql = f"""
-                SELECT {select_fields}
-                FROM book_difficulty
-                ORDER BY {field_name} {order_direction}, id {order_direction}
-                LIMIT %s OFFSET %s
-            """
-            cursor.execute(sql, (page_size, offset))
-            results = cursor.fetchall()
-            cursor.close()
+            results = page_loader.load(current_page)
 
             if not results:
                 if current_page == 0:
@@ -1125,22 +1490,6 @@ def feature_generic_ranking(field_name, field_display_name, title, asc_desc, des
                     continue
 
             # 显示结果
-            print("\n" + "=" * 70)
-            print(f"共 {total_pages} 页 | 第 {current_page + 1} 页（本页 {len(results)} 条 | 总 {total_count} 条）")
-            print("=" * 70)
-
-            # 根据是否显示难度调整表格列
-            if show_difficulty:
-                if field_name == 'difficulty_score':
-                    headers = ['序号', '书名', '难度星级', field_display_name]
-                    col_widths = [6, 48, 24, 10]
-                else:
-                    headers = ['序号', '书名', field_display_name, '难度星级']
-                    col_widths = [6, 40, 12, 24]
-            else:
-                headers = ['序号', '书名', field_display_name]
-                col_widths = [6, 52, 20]
-
             table = TableFormatter(headers, col_widths)
 
             for idx, row in enumerate(results, start=1):
@@ -1167,12 +1516,6 @@ def feature_generic_ranking(field_name, field_display_name, title, asc_desc, des
                 else:
                     table.add_row(str(global_idx), book_name, formatted_value)
 
-            print(table.format())
-
-            # 翻页提示
-            total_width = sum(table.col_widths) + len(table.col_widths) - 1
-            print("-" * total_width)
-
             # 构建提示信息
             tips = []
             if current_page > 0:
@@ -1182,7 +1525,19 @@ def feature_generic_ranking(field_name, field_display_name, title, asc_desc, des
             tips.append("输入页码跳转")
             tips.append("回车返回")
 
-            print("  " + " | ".join(tips))
+            # 【性能优化】用户阅读本页时后台预取下一页
+            if current_page < total_pages - 1:
+                page_loader.prefetch(current_page + 1)
+
+            # 【性能优化】整页（标题、表格、翻页提示）拼好后一次输出
+            print("\n".join((
+                "\n" + "=" * 70,
+                f"共 {total_pages} 页 | 第 {current_page + 1} 页（本页 {len(results)} 条 | 总 {total_count} 条）",
+                "=" * 70,
+                table.format(),
+                "-" * table.total_width,
+                "  " + " | ".join(tips),
+            )))
             choice = input("请选择: ").strip()
 
             if choice == '-' and current_page > 0:
@@ -1207,7 +1562,8 @@ def feature_generic_ranking(field_name, field_display_name, title, asc_desc, des
         import traceback
         traceback.print_exc()
     finally:
-        conn.close()
+        if page_loader is not None:
+            page_loader.close()
 
 
 # ============================================================================
@@ -1226,6 +1582,7 @@ def feature_select_by_star():
         input("\n按回车键返回主菜单...")
         return
 
+    page_loader = None
     try:
         # 用户输入分数范围
         print("\n请输入难度分数范围（0-100分）：")
@@ -1284,20 +1641,19 @@ def feature_select_by_star():
         total_pages = (total_count + page_size - 1) // page_size
         current_page = 0
 
+        page_loader = PrefetchPageLoader(
+            conn, "id, book_name, author, difficulty_score, star_level", "difficulty_score", False, page_size,
+            where="difficulty_score >= %s AND difficulty_score <= %s", params=(min_score, max_score),
+            total_count=total_count
+        )
+
+        # 表格格式
+        headers = ['序号', '书名', '难度星级', '难度分值']
+        col_widths = [6, 48, 24, 10]
+
         while True:
             # 加载当前页数据
-            cursor = conn.cursor()
-            offset = current_page * page_size
-            sql = """
-                SELECT id, book_name, author, difficulty_score, star_level
-                FROM book_difficulty
-                WHERE difficulty_score >= %s AND difficulty_score <= %s
-                ORDER BY difficulty_score ASC, id ASC
-                LIMIT %s OFFSET %s
-            """
-            cursor.execute(sql, (min_score, max_score, page_size, offset))
-            results = cursor.fetchall()
-            cursor.close()
+            results = page_loader.load(current_page)
 
             if not results:
                 if current_page == 0:
@@ -1309,13 +1665,6 @@ def feature_select_by_star():
                     continue
 
             # 显示结果
-            print("\n" + "=" * 70)
-            print(f"共 {total_pages} 页 | 第 {current_page + 1} 页（筛选条件：{min_score:.1f} - {max_score:.1f} 分 | 共 {total_count} 条）")
-            print("=" * 70)
-
-            # 表格格式
-            headers = ['序号', '书名', '难度星级', '难度分值']
-            col_widths = [6, 48, 24, 10]
             table = TableFormatter(headers, col_widths)
 
             for idx, row in enumerate(results, start=1):
@@ -1327,12 +1676,7 @@ def feature_select_by_star():
 
                 table.add_row(str(current_page * page_size + idx), book_name, stars, f"{score:.1f}")
 
-            print(table.format())
-
             # 翻页提示
-            total_width = sum(col_widths) + len(col_widths) - 1
-            print("-" * total_width)
-
             tips = []
             if current_page > 0:
                 tips.append("- 上一页")
@@ -1341,7 +1685,19 @@ def feature_select_by_star():
             tips.append("输入页码跳转")
             tips.append("回车返回")
 
-            print("  " + " | ".join(tips))
+            # 【性能优化】用户阅读本页时后台预取下一页
+            if current_page < total_pages - 1:
+                page_loader.prefetch(current_page + 1)
+
+            # 【性能优化】整页（标题、表格、翻页提示）拼好后一次输出
+            print("\n".join((
+                "\n" + "=" * 70,
+                f"共 {total_pages} 页 | 第 {current_page + 1} 页（筛选条件：{min_score:.1f} - {max_score:.1f} 分 | 共 {total_count} 条）",
+                "=" * 70,
+                table.format(),
+                "-" * table.total_width,
+                "  " + " | ".join(tips),
+            )))
             choice = input("请选择: ").strip()
 
             if choice == '-' and current_page > 0:
@@ -1366,7 +1722,8 @@ def feature_select_by_star():
         import traceback
         traceback.print_exc()
     finally:
-        conn.close()
+        if page_loader is not None:
+            page_loader.close()
 
 
 def feature_difficulty_ranking():
@@ -1516,8 +1873,7 @@ def feature_search_book():
             print(table.format())
 
             # 提示用户选择
-            total_width = sum(col_widths) + len(col_widths) - 1
-            print("-" * total_width)
+            print("-" * table.total_width)
             print("  输入序号查看详情 | 回车返回主菜单")
 
             choice = input("请选择: ").strip()
@@ -1541,8 +1897,6 @@ def feature_search_book():
         import traceback
         traceback.print_exc()
         input("\n按回车键返回主菜单...")
-    finally:
-        conn.close()
 
 
 def show_book_detail(row):
@@ -1753,8 +2107,11 @@ def feature_book_statistics():
                 shared_reference_chars = load_reference_chars()
                 if shared_reference_chars:
                     print(f"  ✓ 已加载 {len(shared_reference_chars)} 个参考字")
+                    # 参考字集合只构建一次，供每本书判断前1500内外
+                    shared_reference_chars_set = frozenset(shared_reference_chars)
                 else:
                     print("  ⚠ 未找到前1500.txt，将使用dict_simple.txt")
+                    shared_reference_chars_set = None
 
                 # 加载字典序
                 print("  ⏳ 加载dict_simple.txt...")
@@ -1768,11 +2125,11 @@ def feature_book_statistics():
 
                 # 【关键优化】预计算所有区间的参考字表集合
                 print("  ⏳ 预计算参考字表集合（这是性能提升的关键）...")
-                stats_ranges = [10, 50, 100, 500, 1000, 1500, 2000, 3000, 5000]
                 shared_reference_sets = precompute_reference_sets(
-                    shared_reference_chars, shared_char_order, stats_ranges
+                    shared_reference_chars, shared_char_order, STATS_RANGES
                 )
-                print(f"  ✓ 已预计算 {len(stats_ranges)} 个区间的字表集合")
+                shared_reference_deltas = precompute_reference_deltas(shared_reference_sets)
+                print(f"  ✓ 已预计算 {len(STATS_RANGES)} 个区间的字表集合")
 
                 print("=" * 70)
                 print("✓ 共享数据加载完成！批量处理将大幅提速")
@@ -1810,105 +2167,181 @@ def feature_book_statistics():
                     except Exception as e:
                         print(f"⚠ 数据库初始化失败: {e}，将跳过数据库上传\n")
 
-                # 定义批量提交函数
-                def flush_pending_data():
-                    """【批量优化】提交待处理的数据到数据库"""
-                    nonlocal pending_inserts, pending_updates
-                    insert_count = 0
-                    update_count = 0
+                # 【批量优化】数据库写入放到后台线程执行
+                # 主循环继续统计下一本书（CPU），后台线程同时等待数据库往返（IO）
+                db_queue = None
+                db_thread = None
 
-                    if pending_inserts:
-                        insert_count = batch_insert_books(db_conn, pending_inserts)
-                        if insert_count > 0:
-                            print(f"    ✓ 批量插入 {insert_count} 条记录")
-                        pending_inserts = []
+                # 后台线程的提示先存起来，由主线程在每本书之间打印，不与单本书的输出交错
+                # （deque的append/popleft是线程安全的）
+                db_messages = deque()
 
-                    if pending_updates:
-                        update_count = batch_update_books(db_conn, pending_updates)
-                        if update_count > 0:
-                            print(f"    ✓ 批量更新 {update_count} 条记录")
-                        pending_updates = []
+                def db_worker(conn):
+                    """【批量优化】后台线程：依次提交队列中的批次，收到None时退出"""
+                    while True:
+                        batch = db_queue.get()
+                        if batch is None:
+                            break
+                        inserts, updates = batch
+                        # 单个批次出错只记录下来，线程继续取队列，主线程put时不会因队列满而卡死
+                        try:
+                            if inserts:
+                                insert_count = batch_insert_books(conn, inserts, log=db_messages.append)
+                                if insert_count > 0:
+                                    db_messages.append(f"    ✓ 批量插入 {insert_count} 条记录")
+                            if updates:
+                                update_count = batch_update_books(conn, updates, log=db_messages.append)
+                                if update_count > 0:
+                                    db_messages.append(f"    ✓ 批量更新 {update_count} 条记录")
+                        except Exception as e:
+                            db_messages.append(f"    ✗ 后台批量提交失败: {e}")
+
+                def print_db_messages():
+                    """打印后台线程积累的提交结果"""
+                    while db_messages:
+                        print(db_messages.popleft())
 
-                    return insert_count + update_count
+                if db_conn:
+                    import queue
+                    import threading
+                    db_queue = queue.Queue(maxsize=4)
+                    db_thread = threading.Thread(target=db_worker, args=(db_conn,), daemon=True)
+                    db_thread.start()
+
+                # 定义批量提交函数
+                def flush_pending_data():
+                    """【批量优化】把待处理的数据交给后台线程提交，立即返回"""
+                    nonlocal pending_inserts, pending_updates
+                    db_queue.put((pending_inserts, pending_updates))
+                    pending_inserts = []
+                    pending_updates = []
 
                 # 存储所有书籍的统计结果用于汇总
                 summary_results = []
                 upload_success_count = 0
                 upload_skip_count = 0
 
-                for idx, file_path in enumerate(files_to_process, start=1):
-                    display_name = os.path.basename(file_path)
-                    print(f"\n{'='*70}")
-                    print(f"[{idx}/{len(files_to_process)}] 正在处理: {display_name}")
-                    print("-" * 70)
-
-                    # 【性能优化】传递共享数据给process_file
-                    result = process_file(
-                        file_path,
-                        batch_mode=True,
-                        db_conn=db_conn,
-                        db_config=db_config,
-                        existing_books=existing_books,  # 【批量优化】传递缓存
-                        shared_reference_chars=shared_reference_chars,
-                        shared_char_order=shared_char_order,
-                        shared_common_chars=shared_common_chars,
-                        shared_reference_sets=shared_reference_sets
-                    )
-                    if result:
-                        summary_results.append(result)
-
-                        # 【批量优化】处理数据库上传数据
-                        if 'db_prepared_data' in result and result['db_prepared_data']:
-                            if result['db_is_update']:
-                                pending_updates.append(result['db_prepared_data'])
-                            else:
-                                pending_inserts.append(result['db_prepared_data'])
+                # 【性能优化】传递共享数据给process_file
+                shared_kwargs = dict(
+                    db_config=db_config,
+                    existing_books=existing_books,  # 【批量优化】传递缓存
+                    shared_reference_chars=shared_reference_chars,
+                    shared_reference_chars_set=shared_reference_chars_set,
+                    shared_char_order=shared_char_order,
+                    shared_common_chars=shared_common_chars,
+                    shared_reference_deltas=shared_reference_deltas
+                )
+
+                # 【性能优化】每本书的统计互不依赖，多本书时用多个进程并行统计（绕开GIL）
+                # 共享数据在每个工作进程初始化时只传一次；数据库写入仍由主进程的后台线程完成，
+                # 工作进程只用existing_books缓存准备数据，不需要数据库连接
+                executor = None
+                worker_count = min(os.cpu_count() or 1, len(files_to_process))
 
-                        # 更新数据库连接（可能在process_file中被更新）
-                        if 'db_conn' in result and result['db_conn'] is not None:
-                            db_conn = result['db_conn']
+                def process_sequentially(paths):
+                    """逐本统计（无法并行或进程池中途失效时使用）"""
+                    for file_path in paths:
+                        yield None, process_file(file_path, batch_mode=True, db_conn=db_conn, **shared_kwargs)
 
-                        # 统计上传情况
-                        upload_status = ""
-                        if 'upload_success' in result:
-                            if result['upload_success']:
+                if worker_count > 1:
+                    try:
+                        from concurrent.futures import ProcessPoolExecutor
+                        from concurrent.futures.process import BrokenProcessPool
+                        executor = ProcessPoolExecutor(
+                            max_workers=worker_count,
+                            initializer=_init_batch_worker,
+                            initargs=(shared_kwargs,)
+                        )
+                        # map按提交顺序返回结果，进度和输出顺序与逐本统计一致
+                        batch_results = executor.map(_process_file_in_worker, files_to_process)
+                        print(f"✓ 使用 {worker_count} 个进程并行统计\n")
+                    except (OSError, ImportError, NotImplementedError) as e:
+                        print(f"⚠ 无法启动并行统计（{e}），改为逐本统计\n")
+                        executor = None
+                if executor is None:
+                    batch_results = process_sequentially(files_to_process)
+
+                try:
+                    for idx, file_path in enumerate(files_to_process, start=1):
+                        display_name = os.path.basename(file_path)
+                        print(f"\n{'='*70}")
+                        print(f"[{idx}/{len(files_to_process)}] 正在处理: {display_name}")
+                        print("-" * 70)
+
+                        try:
+                            worker_output, result = next(batch_results)
+                        except Exception as e:
+                            # 工作进程意外退出（如内存不足被系统结束）后进程池不能再用，剩下的书改为逐本统计
+                            if executor is None or not isinstance(e, BrokenProcessPool):
+                                raise
+                            print(f"⚠ 并行统计进程异常退出（{e}），剩余书籍改为逐本统计\n")
+                            executor.shutdown(cancel_futures=True)
+                            executor = None
+                            batch_results = process_sequentially(files_to_process[idx - 1:])
+                            worker_output, result = next(batch_results)
+                        if worker_output:
+                            sys.stdout.write(worker_output)
+                        if result:
+                            summary_results.append(result)
+
+                            # 【批量优化】处理数据库上传数据
+                            if result.db_prepared_data:
+                                if result.db_is_update:
+                                    pending_updates.append(result.db_prepared_data)
+                                else:
+                                    pending_inserts.append(result.db_prepared_data)
+
+                            # 更新数据库连接（可能在process_file中被更新）
+                            if result.db_conn is not None:
+                                db_conn = result.db_conn
+
+                            # 统计上传情况
+                            if result.upload_success:
                                 upload_success_count += 1
                                 upload_status = " | 准备上传"
                             else:
                                 upload_skip_count += 1
                                 upload_status = " | 跳过上传"
 
-                        # 打印完成信息
-                        print(f"✓ [{idx}/{len(files_to_process)}] 完成: {display_name} (字种数: {result['char_type_count']}, 难度: {result['difficulty_score']:.1f}分{upload_status})")
+                            # 打印完成信息
+                            print(f"✓ [{idx}/{len(files_to_process)}] 完成: {display_name} (字种数: {result.char_type_count}, 难度: {result.difficulty_score:.1f}分{upload_status})")
 
-                        # 【批量优化】达到批量阈值时，批量提交
+                            # 【批量优化】达到批量阈值时，批量提交
+                            total_pending = len(pending_inserts) + len(pending_updates)
+                            if total_pending >= batch_threshold and db_conn:
+                                print(f"\n  【批量提交】已积累 {total_pending} 条数据，交给后台线程提交...")
+                                flush_pending_data()
+                        else:
+                            print(f"✗ [{idx}/{len(files_to_process)}] 失败: {display_name}")
+                        print_db_messages()
+                        print("="*70)
+                finally:
+                    # 【批量优化】正常结束或中途出错都要收尾：停止进程池（取消未开始的书），
+                    # 提交已统计好的数据，结束后台线程并关闭连接
+                    if executor is not None:
+                        executor.shutdown(cancel_futures=True)
+
+                    # 【批量优化】处理剩余的待提交数据
+                    if db_conn and (pending_inserts or pending_updates):
                         total_pending = len(pending_inserts) + len(pending_updates)
-                        if total_pending >= batch_threshold and db_conn:
-                            print(f"\n  【批量提交】已积累 {total_pending} 条数据，开始批量处理...")
-                            affected = flush_pending_data()
-                            if affected > 0:
-                                print(f"  【批量提交】成功处理 {affected} 条记录\n")
-                    else:
-                        print(f"✗ [{idx}/{len(files_to_process)}] 失败: {display_name}")
-                    print("="*70)
-
-                # 【批量优化】处理剩余的待提交数据
-                if db_conn and (pending_inserts or pending_updates):
-                    total_pending = len(pending_inserts) + len(pending_updates)
-                    print(f"\n{'='*70}")
-                    print(f"【最终批量提交】处理剩余 {total_pending} 条数据...")
-                    print("="*70)
-                    affected = flush_pending_data()
-                    if affected > 0:
-                        print(f"✓ 成功处理 {affected} 条记录\n")
-
-                # 关闭数据库连接
-                if db_conn:
-                    try:
-                        db_conn.close()
-                        print("✓ 数据库连接已关闭\n")
-                    except:
-                        pass
+                        print(f"\n{'='*70}")
+                        print(f"【最终批量提交】处理剩余 {total_pending} 条数据...")
+                        print("="*70)
+                        flush_pending_data()
+
+                    # 等待后台线程提交完所有批次
+                    if db_thread:
+                        db_queue.put(None)
+                        db_thread.join()
+                        print_db_messages()
+
+                    # 关闭数据库连接
+                    if db_conn:
+                        try:
+                            db_conn.close()
+                            print("✓ 数据库连接已关闭\n")
+                        except:
+                            pass
 
                 # 生成汇总报告
                 if summary_results:
@@ -1959,11 +2392,10 @@ def main():
     # 0. 确保输出文件夹存在
     ensure_output_folder()
 
-    # 检查编码检测库
-    try:
-        import chardet
+    # 检查编码检测库（只查找不导入，实际检测编码时才加载）
+    if importlib.util.find_spec('chardet') is not None:
         print("\n✓ 已安装 chardet 库，将使用高精度编码检测")
-    except ImportError:
+    else:
         print("\n⚠ 未安装 chardet 库，将使用基础编码检测")
         print("  建议安装以提高编码检测准确率: pip install chardet")
 
@@ -2009,7 +2441,8 @@ def main():
 
 def process_file(selected_file, batch_mode=False, db_conn=None, db_config=None, existing_books=None,
                  shared_reference_chars=None, shared_char_order=None,
-                 shared_common_chars=None, shared_reference_sets=None):
+                 shared_common_chars=None, shared_reference_deltas=None,
+                 shared_reference_chars_set=None):
     """处理单个文件的统计
 
     Args:
@@ -2021,7 +2454,8 @@ def process_file(selected_file, batch_mode=False, db_conn=None, db_config=None,
         shared_reference_chars: 【性能优化】共享的前1500字列表（避免重复加载）
         shared_char_order: 【性能优化】共享的字典序映射（避免重复加载）
         shared_common_chars: 【性能优化】共享的常用字集合（避免重复加载）
-        shared_reference_sets: 【性能优化】预计算的参考字表集合（避免重复计算）
+        shared_reference_deltas: 【性能优化】预计算的各区间参考字增量（避免重复计算）
+        shared_reference_chars_set: 【性能优化】共享的前1500字集合（避免每本书重建set）
 
     线程安全性：所有shared_*参数都是只读的，不会被修改
     """
@@ -2065,62 +2499,46 @@ def process_file(selected_file, batch_mode=False, db_conn=None, db_config=None,
     chars_in_dict = []
     chars_not_in_dict = []
 
+    # 【性能优化】每个字只查一次字典（get代替先in再取值）
+    get_order = char_order.get
     for char, count in char_counter.items():
-        if char in char_order:
-            chars_in_dict.append((char, count, char_order[char]))
+        order = get_order(char)
+        if order is not None:
+            chars_in_dict.append((char, count, order))
         else:
             chars_not_in_dict.append((char, count))
 
     # 在字典中的字按字序排序
-    chars_in_dict.sort(key=lambda x: x[2])
+    # 【性能优化】排序键用itemgetter（C实现），代替每个元素调用一次lambda
+    chars_in_dict.sort(key=itemgetter(2))
     # 不在字典中的字按出现次数降序排序
-    chars_not_in_dict.sort(key=lambda x: x[1], reverse=True)
+    chars_not_in_dict.sort(key=itemgetter(1), reverse=True)
 
     # 6.5 计算文字散列度指标
     # 按出现次数降序排列所有字符（用于计算累积覆盖率）
-    all_chars_by_freq = sorted(char_counter.items(), key=lambda x: x[1], reverse=True)
+    all_chars_by_freq = sorted(char_counter.items(), key=itemgetter(1), reverse=True)
 
     # 【性能优化】计算不同区间的统计 - 使用预计算的集合或现场计算
-    stats_ranges = [10, 50, 100, 500, 1000, 1500, 2000, 3000, 5000]
-    coverage_stats = {}
-
-    if shared_reference_sets is not None:
-        # 批量模式：使用预计算的集合，避免重复排序
-        for n in stats_ranges:
-            coverage_stats[n] = calculate_coverage_stats_optimized(
-                n, shared_reference_sets, char_counter, total_chars
-            )
+    if shared_reference_deltas is not None:
+        # 批量模式：使用预计算的区间增量，避免重复排序
+        coverage_stats = calculate_coverage_stats_all(
+            shared_reference_deltas, char_counter, total_chars
+        )
     else:
         # 单文件模式：现场计算（也比旧版快，因为用了优化的算法）
         # 预计算一次参考集合
-        local_reference_sets = precompute_reference_sets(reference_chars, char_order, stats_ranges)
-        for n in stats_ranges:
-            coverage_stats[n] = calculate_coverage_stats_optimized(
-                n, local_reference_sets, char_counter, total_chars
-            )
+        local_reference_sets = precompute_reference_sets(reference_chars, char_order, STATS_RANGES)
+        local_reference_deltas = precompute_reference_deltas(local_reference_sets)
+        coverage_stats = calculate_coverage_stats_all(
+            local_reference_deltas, char_counter, total_chars
+        )
 
     # 【性能优化】计算累积覆盖率（覆盖X%的文本需要多少字）
-    # 使用标志位代替any()查找，从O(n²)优化到O(n)
-    cumulative_coverage = []
-    cumulative_count = 0
-    thresholds = {50: False, 80: False, 90: False, 95: False, 99: False}
-
-    for idx, (char, count) in enumerate(all_chars_by_freq, start=1):
-        cumulative_count += count
-        coverage_pct = (cumulative_count / total_chars) * 100
-
-        # O(1)检查和标记，避免重复的any()查找
-        for threshold in [50, 80, 90, 95, 99]:
-            if not thresholds[threshold] and coverage_pct >= threshold:
-                cumulative_coverage.append((threshold, idx, coverage_pct))
-                thresholds[threshold] = True
-
-        # 提前退出：所有阈值都找到了，无需继续遍历
-        if all(thresholds.values()):
-            break
-
-    # 100%覆盖就是所有字种数
-    cumulative_coverage.append((100, len(char_counter), 100.0))
+    # 累计次数前缀和只算一次，报告中前3/前10字的累计次数也直接从中取
+    cumulative_counts = list(accumulate(map(itemgetter(1), all_chars_by_freq)))
+    cumulative_coverage = calculate_cumulative_coverage(
+        all_chars_by_freq, total_chars, cumulative_counts=cumulative_counts
+    )
 
     # 6.6 形码用户专属分析
     # 【性能优化】优先使用共享的常用字集合
@@ -2130,25 +2548,25 @@ def process_file(selected_file, batch_mode=False, db_conn=None, db_config=None,
             print(f"使用共享常用字表，共 {len(common_chars)} 个常用字")
     else:
         print("\n正在加载常用字表...")
-        common_chars = load_common_chars(reference_chars, char_order)
+        if shared_reference_chars is None and shared_char_order is None:
+            common_chars = load_default_common_chars()
+        else:
+            common_chars = load_common_chars(reference_chars, char_order)
         print(f"加载了 {len(common_chars)} 个常用字")
 
     print("正在分析生僻字...")
-    rare_analysis = analyze_rare_chars(char_counter, common_chars)
+    rare_analysis = analyze_rare_chars(char_counter, common_chars, total_chars=total_chars)
 
     # 计算95%和99%覆盖的平均字序
     print("正在计算平均字序...")
-    chars_for_95_pct = 0
-    chars_for_99_pct = 0
-    for target_pct, char_count, _ in cumulative_coverage:
-        if target_pct == 95:
-            chars_for_95_pct = char_count
-        if target_pct == 99:
-            chars_for_99_pct = char_count
+    # 【性能优化】95%和99%所需字数只查一次，报告和控制台输出直接复用
+    coverage_char_counts = {target_pct: char_count for target_pct, char_count, _ in cumulative_coverage}
+    chars_95 = coverage_char_counts.get(95, 0)
+    chars_99 = coverage_char_counts.get(99, 0)
 
     # 获取达到95%和99%所需的字
-    chars_for_95_list = all_chars_by_freq[:chars_for_95_pct] if chars_for_95_pct > 0 else []
-    chars_for_99_list = all_chars_by_freq[:chars_for_99_pct] if chars_for_99_pct > 0 else []
+    chars_for_95_list = all_chars_by_freq[:chars_95] if chars_95 > 0 else []
+    chars_for_99_list = all_chars_by_freq[:chars_99] if chars_99 > 0 else []
 
     # 计算平均字序
     avg_order_95 = calculate_avg_char_order(chars_for_95_list, char_order)
@@ -2157,13 +2575,20 @@ def process_file(selected_file, batch_mode=False, db_conn=None, db_config=None,
     # 计算超出前1500.txt的字种数
     print("正在计算超出前1500的字种数...")
     if reference_chars:
-        reference_chars_set = set(reference_chars)
-        extra_char_types = sum(1 for char in char_counter.keys() if char not in reference_chars_set)
+        if shared_reference_chars_set is not None:
+            reference_chars_set = shared_reference_chars_set
+        else:
+            reference_chars_set = frozenset(reference_chars)
+        # 【性能优化】字典键视图直接与集合做差集，在C层完成
+        extra_char_types = len(char_counter.keys() - reference_chars_set)
 
         # 计算95%和99%覆盖字数中前1500内外的分布
-        chars_95_in_ref = sum(1 for char, _ in chars_for_95_list if char in reference_chars_set)
+        # 【性能优化】95%所需字是99%所需字的前缀，只做一次成员判断；
+        # map + set.__contains__ 在C层循环，避免逐个字的生成器开销
+        in_ref_flags = list(map(reference_chars_set.__contains__, map(itemgetter(0), chars_for_99_list)))
+        chars_95_in_ref = sum(in_ref_flags[:len(chars_for_95_list)])
         chars_95_out_ref = len(chars_for_95_list) - chars_95_in_ref
-        chars_99_in_ref = sum(1 for char, _ in chars_for_99_list if char in reference_chars_set)
+        chars_99_in_ref = sum(in_ref_flags)
         chars_99_out_ref = len(chars_for_99_list) - chars_99_in_ref
     else:
         # 如果没有前1500.txt，使用CHAR_TYPES_BASELINE作为基准
@@ -2178,326 +2603,302 @@ def process_file(selected_file, batch_mode=False, db_conn=None, db_config=None,
         char_counter, total_chars, coverage_stats, cumulative_coverage, avg_order_95, avg_order_99, extra_char_types
     )
 
+    # 前500/1000/1500字覆盖率：报告、控制台和返回结果都要用，只取一次
+    coverage_500 = coverage_stats[500]['coverage']
+    coverage_1000 = coverage_stats[1000]['coverage']
+    coverage_1500 = coverage_stats[1500]['coverage']
+
+    # 字种数及前1500内字种数：报告、控制台和返回结果多处使用，只算一次
+    char_type_count = len(char_counter)
+    char_types_in_ref = char_type_count - extra_char_types
+
     # 7. 输出结果到文件（只使用文件名，不包含路径）
     base_filename = os.path.basename(selected_file)  # 去掉路径，只保留文件名
     output_filename = f"{os.path.splitext(base_filename)[0]}_字频统计_难度{difficulty_score:.1f}.txt"
     output_file = os.path.join(OUTPUT_FOLDER, output_filename)
 
-    with open(output_file, 'w', encoding='utf-8') as f:
-        # 写入表头
-        f.write("=" * 80 + "\n")
-        f.write("【书籍难度分析报告】\n")
-        f.write("=" * 80 + "\n\n")
-        f.write(f"文件名: {base_filename}\n")
-        f.write(f"文件编码: {file_encoding.upper() if file_encoding else '未知'}\n")
-        f.write(f"总字符数: {total_chars}\n")
-        f.write(f"字种数: {len(char_counter)} 个（其中前1500内: {len(char_counter) - extra_char_types} 个，前1500外: {extra_char_types} 个）\n")
-        f.write("=" * 80 + "\n\n")
-
-        # ========== 核心评估指标（形码用户最关心） ==========
-        f.write("【核心评估指标】\n")
-        f.write("=" * 80 + "\n\n")
-
-        # 1. 书籍难度评级
-        f.write(f"1. 书籍难度评级\n")
-        f.write(f"   {stars}  （难度分数：{difficulty_score:.1f}/100）\n\n")
-        f.write(f"   评估维度：\n")
-
-        # 只显示权重>0的维度
-        if WEIGHT_CHAR_TYPES > 0:
-            f.write(f"     • 字种数：{len(char_counter)} 个（前1500内: {len(char_counter) - extra_char_types} 个，前1500外: {extra_char_types} 个）\n")
-
-        if WEIGHT_COVERAGE_500 > 0:
-            f.write(f"     • 前500字覆盖率：{coverage_stats[500]['coverage']:.2f}%\n")
-        if WEIGHT_COVERAGE_1000 > 0:
-            f.write(f"     • 前1000字覆盖率：{coverage_stats[1000]['coverage']:.2f}%\n")
-        if WEIGHT_COVERAGE_1500 > 0:
-            f.write(f"     • 前1500字覆盖率：{coverage_stats[1500]['coverage']:.2f}%\n")
-
-        # 找出95%和99%所需字数
-        chars_95, chars_99 = 0, 0
-        for target_pct, char_count, _ in cumulative_coverage:
-            if target_pct == 95:
-                chars_95 = char_count
-            if target_pct == 99:
-                chars_99 = char_count
-
-        if WEIGHT_CHARS_95 > 0:
-            f.write(f"     • 95%覆盖所需字数：{chars_95} 个（前{CHAR_TYPES_BASELINE}内: {chars_95_in_ref}，前{CHAR_TYPES_BASELINE}外: {chars_95_out_ref}）\n")
-        if WEIGHT_CHARS_99 > 0:
-            f.write(f"     • 99%覆盖所需字数：{chars_99} 个（前{CHAR_TYPES_BASELINE}内: {chars_99_in_ref}，前{CHAR_TYPES_BASELINE}外: {chars_99_out_ref}）\n")
-
-        # 添加平均字序
-        if WEIGHT_ORDER_95 > 0:
-            if avg_order_95 is not None:
-                f.write(f"     • 95%平均字序：{avg_order_95:.1f}  （字序越小=越常用）\n")
-            else:
-                f.write(f"     • 95%平均字序：无数据\n")
+    # 【性能优化】先在内存中拼好整份报告，最后一次性写入文件
+    # 避免几百次f.write各自经过TextIOWrapper的编码和加锁开销；
+    # 也不再逐本fsync：关闭文件即交给系统缓存，批量模式下省去每本书的同步落盘等待
+    report = io.StringIO()
+
+    # 写入表头
+    report.write(SEP_EQ + "\n")
+    report.write("【书籍难度分析报告】\n")
+    report.write(SEP_EQ + "\n\n")
+    report.write(f"文件名: {base_filename}\n")
+    report.write(f"文件编码: {file_encoding.upper() if file_encoding else '未知'}\n")
+    report.write(f"总字符数: {total_chars}\n")
+    report.write(f"字种数: {char_type_count} 个（其中前1500内: {char_types_in_ref} 个，前1500外: {extra_char_types} 个）\n")
+    report.write(SEP_EQ + "\n\n")
+
+    # ========== 核心评估指标（形码用户最关心） ==========
+    report.write("【核心评估指标】\n")
+    report.write(SEP_EQ + "\n\n")
+
+    # 1. 书籍难度评级
+    report.write(f"1. 书籍难度评级\n")
+    report.write(f"   {stars}  （难度分数：{difficulty_score:.1f}/100）\n\n")
+    report.write(f"   评估维度：\n")
+
+    # 只显示权重>0的维度
+    if WEIGHT_CHAR_TYPES > 0:
+        report.write(f"     • 字种数：{char_type_count} 个（前1500内: {char_types_in_ref} 个，前1500外: {extra_char_types} 个）\n")
+
+    if WEIGHT_COVERAGE_500 > 0:
+        report.write(f"     • 前500字覆盖率：{coverage_500:.2f}%\n")
+    if WEIGHT_COVERAGE_1000 > 0:
+        report.write(f"     • 前1000字覆盖率：{coverage_1000:.2f}%\n")
+    if WEIGHT_COVERAGE_1500 > 0:
+        report.write(f"     • 前1500字覆盖率：{coverage_1500:.2f}%\n")
+
+    if WEIGHT_CHARS_95 > 0:
+        report.write(f"     • 95%覆盖所需字数：{chars_95} 个（前{CHAR_TYPES_BASELINE}内: {chars_95_in_ref}，前{CHAR_TYPES_BASELINE}外: {chars_95_out_ref}）\n")
+    if WEIGHT_CHARS_99 > 0:
+        report.write(f"     • 99%覆盖所需字数：{chars_99} 个（前{CHAR_TYPES_BASELINE}内: {chars_99_in_ref}，前{CHAR_TYPES_BASELINE}外: {chars_99_out_ref}）\n")
+
+    # 添加平均字序
+    if WEIGHT_ORDER_95 > 0:
+        if avg_order_95 is not None:
+            report.write(f"     • 95%平均字序：{avg_order_95:.1f}  （字序越小=越常用）\n")
+        else:
+            report.write(f"     • 95%平均字序：无数据\n")
 
-        if WEIGHT_ORDER_99 > 0:
-            if avg_order_99 is not None:
-                f.write(f"     • 99%平均字序：{avg_order_99:.1f}  （字序越小=越常用）\n")
-            else:
-                f.write(f"     • 99%平均字序：无数据\n")
-        f.write("\n")
-        f.write(f"   💡 说明：\n")
-        # 动态计算权重分配（只显示非0权重）
-        total_weight = score_details['total_weight']
-        if total_weight > 0:
-            weight_parts = []
-            coverage_weight = WEIGHT_COVERAGE_500 + WEIGHT_COVERAGE_1000 + WEIGHT_COVERAGE_1500
-            if coverage_weight > 0:
-                coverage_pct = coverage_weight / total_weight * 100
-                weight_parts.append(f"覆盖率{coverage_pct:.0f}%")
-
-            chars_weight = WEIGHT_CHARS_95 + WEIGHT_CHARS_99
-            if chars_weight > 0:
-                chars_pct = chars_weight / total_weight * 100
-                weight_parts.append(f"字数{chars_pct:.0f}%")
-
-            order_weight = WEIGHT_ORDER_95 + WEIGHT_ORDER_99
-            if order_weight > 0:
-                order_pct = order_weight / total_weight * 100
-                weight_parts.append(f"字序{order_pct:.0f}%")
-
-            if WEIGHT_CHAR_TYPES > 0:
-                types_pct = WEIGHT_CHAR_TYPES / total_weight * 100
-                weight_parts.append(f"字种{types_pct:.0f}%")
-
-            f.write(f"     - 权重分配：{' + '.join(weight_parts)}\n")
+    if WEIGHT_ORDER_99 > 0:
+        if avg_order_99 is not None:
+            report.write(f"     • 99%平均字序：{avg_order_99:.1f}  （字序越小=越常用）\n")
         else:
-            f.write(f"     - 权重分配：未设置\n")
-        f.write("\n")
-
-        # 2. 生僻字分析
-        f.write(f"2. 生僻字分析\n")
-        f.write(f"   生僻字字种数：{rare_analysis['rare_type_count']} 个（占字种{rare_analysis['rare_type_ratio']*100:.2f}%）\n")
-        f.write(f"   生僻字出现次数：{rare_analysis['rare_char_count']} 次（占文本{rare_analysis['rare_char_ratio']*100:.2f}%）\n")
-        f.write(f"   说明：生僻字指不在常用3500字内的字，打字时可能需要查编码\n")
-
-        # 显示前20个最常见的生僻字
-        if rare_analysis['rare_chars']:
-            f.write(f"\n   最常见的生僻字（前20个）：\n")
-            top_rare = rare_analysis['rare_chars'][:20]
-            for i in range(0, len(top_rare), 10):
-                chars_line = "、".join([f"{char}({count})" for char, count in top_rare[i:i+10]])
-                f.write(f"   {chars_line}\n")
-
-        f.write("\n" + "=" * 80 + "\n\n")
-
-        # 高频字覆盖率分析 - 使用TableFormatter
-        f.write("【高频字覆盖率分析】\n")
-        coverage_table = TableFormatter(
-            ['区间', '累计次数', '覆盖率', '平均出现次数'],
-            [12, 15, 15, 15]
+            report.write(f"     • 99%平均字序：无数据\n")
+    report.write("\n")
+    report.write(f"   💡 说明：\n")
+    # 【性能优化】权重分配说明只取决于配置，直接使用模块加载时生成的文本
+    report.write(f"     - 权重分配：{WEIGHT_ALLOCATION_TEXT}\n")
+    report.write("\n")
+
+    # 2. 生僻字分析
+    report.write(f"2. 生僻字分析\n")
+    report.write(f"   生僻字字种数：{rare_analysis['rare_type_count']} 个（占字种{rare_analysis['rare_type_ratio']*100:.2f}%）\n")
+    report.write(f"   生僻字出现次数：{rare_analysis['rare_char_count']} 次（占文本{rare_analysis['rare_char_ratio']*100:.2f}%）\n")
+    report.write(f"   说明：生僻字指不在常用3500字内的字，打字时可能需要查编码\n")
+
+    # 显示前20个最常见的生僻字
+    if rare_analysis['top_rare_chars']:
+        report.write(f"\n   最常见的生僻字（前20个）：\n")
+        top_rare = rare_analysis['top_rare_chars']
+        for i in range(0, len(top_rare), 10):
+            chars_line = "、".join([f"{char}({count})" for char, count in top_rare[i:i+10]])
+            report.write(f"   {chars_line}\n")
+
+    report.write("\n" + SEP_EQ + "\n\n")
+
+    # 高频字覆盖率分析 - 使用TableFormatter
+    report.write("【高频字覆盖率分析】\n")
+    coverage_table = TableFormatter(
+        ['区间', '累计次数', '覆盖率', '平均出现次数'],
+        [12, 15, 15, 15]
+    )
+    for n in STATS_RANGES:
+        stats = coverage_stats[n]
+        coverage_table.add_row(
+            f"前{n}",
+            str(stats['total_count']),
+            f"{stats['coverage']:.2f}%",
+            f"{stats['avg_count']:.1f}"
         )
-        for n in stats_ranges:
-            stats = coverage_stats[n]
-            coverage_table.add_row(
-                f"前{n}",
-                str(stats['total_count']),
-                f"{stats['coverage']:.2f}%",
-                f"{stats['avg_count']:.1f}"
-            )
 
-        # 输出表格，每行前面加3个空格缩进
-        for line in coverage_table.format().split('\n'):
-            f.write(f"   {line}\n")
-
-        # 1. 累积覆盖率分析 - 使用TableFormatter
-        f.write(f"\n1. 累积覆盖率分析\n")
-        cumulative_table = TableFormatter(['覆盖率', '所需字数'], [15, 15])
-        for target_pct, char_count, actual_pct in cumulative_coverage:
-            cumulative_table.add_row(f"{actual_pct:.2f}%", str(char_count))
-
-        # 输出表格，每行前面加3个空格缩进
-        for line in cumulative_table.format().split('\n'):
-            f.write(f"   {line}\n")
-
-        # 2. 最高频字分析
-        f.write(f"\n2. 最高频字分析\n")
-        top_char, top_count = all_chars_by_freq[0]
-        top_pct = (top_count / total_chars) * 100
-        f.write(f"   最高频字: '{top_char}' 出现 {top_count} 次，占比 {top_pct:.2f}%\n")
-
-        if len(all_chars_by_freq) >= 3:
-            top3_count = sum(count for char, count in all_chars_by_freq[:3])
-            top3_pct = (top3_count / total_chars) * 100
-            top3_chars = '、'.join([char for char, count in all_chars_by_freq[:3]])
-            f.write(f"   前3个字: {top3_chars}，累计占比 {top3_pct:.2f}%\n")
-
-        if len(all_chars_by_freq) >= 10:
-            top10_count = sum(count for char, count in all_chars_by_freq[:10])
-            top10_pct = (top10_count / total_chars) * 100
-            f.write(f"   前10个字: 累计占比 {top10_pct:.2f}%\n")
-
-        # 3. 低频字分析
-        f.write(f"\n3. 低频字分析\n")
-        once_chars = [char for char, count in char_counter.items() if count == 1]
-        twice_chars = [char for char, count in char_counter.items() if count == 2]
-        low_freq_chars = [char for char, count in char_counter.items() if count <= 5]
-
-        f.write(f"   仅出现1次的字: {len(once_chars)} 个 ({len(once_chars)/len(char_counter)*100:.2f}%)\n")
-        f.write(f"   仅出现2次的字: {len(twice_chars)} 个 ({len(twice_chars)/len(char_counter)*100:.2f}%)\n")
-        f.write(f"   出现≤5次的字: {len(low_freq_chars)} 个 ({len(low_freq_chars)/len(char_counter)*100:.2f}%)\n")
-
-        f.write("\n" + "=" * 80 + "\n\n")
-
-        # 添加详细算式展示（只显示权重>0的维度）
-        f.write(f"   📊 难度计算详情：\n")
-        f.write(f"   ------------------------------------------------------------------\n")
-
-        # 覆盖率维度
-        coverage_weight = WEIGHT_COVERAGE_500 + WEIGHT_COVERAGE_1000 + WEIGHT_COVERAGE_1500
-        if coverage_weight > 0:
-            score_500, weight_500, val_500 = score_details['coverage_500']
-            score_1000, weight_1000, val_1000 = score_details['coverage_1000']
-            score_1500, weight_1500, val_1500 = score_details['coverage_1500']
-            coverage_total = score_500 + score_1000 + score_1500
-            coverage_pct = coverage_weight / total_weight * 100 if total_weight > 0 else 0
-
-            f.write(f"   【覆盖率维度】 (权重 {coverage_pct:.0f}%)\n")
-            if COVERAGE_LINEAR_MODE:
-                f.write(f"     评分标准: 0%→满分 (最难), 100%→0分 (最简单), 加速系数={COVERAGE_ACCELERATION}\n")
+    # 输出表格，每行前面加3个空格缩进
+    for line in coverage_table.format().split('\n'):
+        report.write(f"   {line}\n")
+
+    # 1. 累积覆盖率分析 - 使用TableFormatter
+    report.write(f"\n1. 累积覆盖率分析\n")
+    cumulative_table = TableFormatter(['覆盖率', '所需字数'], [15, 15])
+    for target_pct, char_count, actual_pct in cumulative_coverage:
+        cumulative_table.add_row(f"{actual_pct:.2f}%", str(char_count))
+
+    # 输出表格，每行前面加3个空格缩进
+    for line in cumulative_table.format().split('\n'):
+        report.write(f"   {line}\n")
+
+    # 2. 最高频字分析
+    report.write(f"\n2. 最高频字分析\n")
+    top_char, top_count = all_chars_by_freq[0]
+    top_pct = (top_count / total_chars) * 100
+    report.write(f"   最高频字: '{top_char}' 出现 {top_count} 次，占比 {top_pct:.2f}%\n")
+
+    if len(all_chars_by_freq) >= 3:
+        top3_count = cumulative_counts[2]
+        top3_pct = (top3_count / total_chars) * 100
+        top3_chars = '、'.join([char for char, count in all_chars_by_freq[:3]])
+        report.write(f"   前3个字: {top3_chars}，累计占比 {top3_pct:.2f}%\n")
+
+    if len(all_chars_by_freq) >= 10:
+        top10_count = cumulative_counts[9]
+        top10_pct = (top10_count / total_chars) * 100
+        report.write(f"   前10个字: 累计占比 {top10_pct:.2f}%\n")
+
+    # 3. 低频字分析
+    report.write(f"\n3. 低频字分析\n")
+    # 【性能优化】只需要个数：一次遍历统计"出现次数"的分布，不再三次扫描字表、生成字列表
+    count_distribution = Counter(char_counter.values())
+    once_count = count_distribution[1]
+    twice_count = count_distribution[2]
+    low_freq_count = sum(map(count_distribution.__getitem__, range(1, 6)))
+
+    report.write(f"   仅出现1次的字: {once_count} 个 ({once_count/char_type_count*100:.2f}%)\n")
+    report.write(f"   仅出现2次的字: {twice_count} 个 ({twice_count/char_type_count*100:.2f}%)\n")
+    report.write(f"   出现≤5次的字: {low_freq_count} 个 ({low_freq_count/char_type_count*100:.2f}%)\n")
+
+    report.write("\n" + SEP_EQ + "\n\n")
+
+    # 添加详细算式展示（只显示权重>0的维度）
+    report.write(f"   📊 难度计算详情：\n")
+    report.write(f"   ------------------------------------------------------------------\n")
+    total_weight = score_details['total_weight']
+
+    # 覆盖率维度
+    # 权重为0的维度整块跳过，不做任何取值和格式化
+    if COVERAGE_WEIGHT > 0:
+        score_500, weight_500, val_500 = score_details['coverage_500']
+        score_1000, weight_1000, val_1000 = score_details['coverage_1000']
+        score_1500, weight_1500, val_1500 = score_details['coverage_1500']
+        coverage_total = score_500 + score_1000 + score_1500
+        coverage_pct = COVERAGE_WEIGHT / total_weight * 100 if total_weight > 0 else 0
+
+        report.write(f"   【覆盖率维度】 (权重 {coverage_pct:.0f}%)\n")
+        if COVERAGE_LINEAR_MODE:
+            report.write(f"     评分标准: 0%→满分 (最难), 100%→0分 (最简单), 加速系数={COVERAGE_ACCELERATION}\n")
+        else:
+            report.write(f"     评分标准: 区间模式, 500字({COVERAGE_500_MIN}%-{COVERAGE_500_MAX}%), ")
+            report.write(f"1000字({COVERAGE_1000_MIN}%-{COVERAGE_1000_MAX}%), ")
+            report.write(f"1500字({COVERAGE_1500_MIN}%-{COVERAGE_1500_MAX}%)\n")
+
+        if weight_500 > 0:
+            report.write(f"     前500字覆盖: {val_500:.1f}% → 得分 {score_500:.2f}/{weight_500}\n")
+        if weight_1000 > 0:
+            report.write(f"     前1000字覆盖: {val_1000:.1f}% → 得分 {score_1000:.2f}/{weight_1000}\n")
+        if weight_1500 > 0:
+            report.write(f"     前1500字覆盖: {val_1500:.1f}% → 得分 {score_1500:.2f}/{weight_1500}\n")
+        report.write(f"     小计: {coverage_total:.2f}\n\n")
+
+    # 字数维度
+    if CHARS_WEIGHT > 0:
+        score_95c, weight_95c, val_95c = score_details['chars_95']
+        score_99c, weight_99c, val_99c = score_details['chars_99']
+        chars_total = score_95c + score_99c
+        chars_pct = CHARS_WEIGHT / total_weight * 100 if total_weight > 0 else 0
+
+        report.write(f"   【字数维度】 (权重 {chars_pct:.0f}%)\n")
+        report.write(f"     评分标准: 95%区间[{CHARS_95_MIN}-{CHARS_95_MAX}字], 99%区间[{CHARS_99_MIN}-{CHARS_99_MAX}字]\n")
+        if weight_95c > 0:
+            report.write(f"     95%覆盖字数: {val_95c} 个 → 得分 {score_95c:.2f}/{weight_95c}\n")
+        if weight_99c > 0:
+            report.write(f"     99%覆盖字数: {val_99c} 个 → 得分 {score_99c:.2f}/{weight_99c}\n")
+        report.write(f"     小计: {chars_total:.2f}\n\n")
+
+    # 字序维度
+    if ORDER_WEIGHT > 0:
+        score_95o, weight_95o, val_95o = score_details['order_95']
+        score_99o, weight_99o, val_99o = score_details['order_99']
+        order_total = score_95o + score_99o
+        order_pct = ORDER_WEIGHT / total_weight * 100 if total_weight > 0 else 0
+
+        report.write(f"   【字序维度】 (权重 {order_pct:.0f}%)\n")
+        report.write(f"     评分标准: 95%区间[{ORDER_95_MIN}-{ORDER_95_MAX}], 99%区间[{ORDER_99_MIN}-{ORDER_99_MAX}], 加速系数={ORDER_ACCELERATION}\n")
+        if weight_95o > 0:
+            if val_95o is not None:
+                report.write(f"     95%平均字序: {val_95o:.1f} → 得分 {score_95o:.2f}/{weight_95o}\n")
             else:
-                f.write(f"     评分标准: 区间模式, 500字({COVERAGE_500_MIN}%-{COVERAGE_500_MAX}%), ")
-                f.write(f"1000字({COVERAGE_1000_MIN}%-{COVERAGE_1000_MAX}%), ")
-                f.write(f"1500字({COVERAGE_1500_MIN}%-{COVERAGE_1500_MAX}%)\n")
-
-            if weight_500 > 0:
-                f.write(f"     前500字覆盖: {val_500:.1f}% → 得分 {score_500:.2f}/{weight_500}\n")
-            if weight_1000 > 0:
-                f.write(f"     前1000字覆盖: {val_1000:.1f}% → 得分 {score_1000:.2f}/{weight_1000}\n")
-            if weight_1500 > 0:
-                f.write(f"     前1500字覆盖: {val_1500:.1f}% → 得分 {score_1500:.2f}/{weight_1500}\n")
-            f.write(f"     小计: {coverage_total:.2f}\n\n")
-
-        # 字数维度
-        chars_weight = WEIGHT_CHARS_95 + WEIGHT_CHARS_99
-        if chars_weight > 0:
-            score_95c, weight_95c, val_95c = score_details['chars_95']
-            score_99c, weight_99c, val_99c = score_details['chars_99']
-            chars_total = score_95c + score_99c
-            chars_pct = chars_weight / total_weight * 100 if total_weight > 0 else 0
-
-            f.write(f"   【字数维度】 (权重 {chars_pct:.0f}%)\n")
-            f.write(f"     评分标准: 95%区间[{CHARS_95_MIN}-{CHARS_95_MAX}字], 99%区间[{CHARS_99_MIN}-{CHARS_99_MAX}字]\n")
-            if weight_95c > 0:
-                f.write(f"     95%覆盖字数: {val_95c} 个 → 得分 {score_95c:.2f}/{weight_95c}\n")
-            if weight_99c > 0:
-                f.write(f"     99%覆盖字数: {val_99c} 个 → 得分 {score_99c:.2f}/{weight_99c}\n")
-            f.write(f"     小计: {chars_total:.2f}\n\n")
-
-        # 字序维度
-        order_weight = WEIGHT_ORDER_95 + WEIGHT_ORDER_99
-        if order_weight > 0:
-            score_95o, weight_95o, val_95o = score_details['order_95']
-            score_99o, weight_99o, val_99o = score_details['order_99']
-            order_total = score_95o + score_99o
-            order_pct = order_weight / total_weight * 100 if total_weight > 0 else 0
-
-            f.write(f"   【字序维度】 (权重 {order_pct:.0f}%)\n")
-            f.write(f"     评分标准: 95%区间[{ORDER_95_MIN}-{ORDER_95_MAX}], 99%区间[{ORDER_99_MIN}-{ORDER_99_MAX}], 加速系数={ORDER_ACCELERATION}\n")
-            if weight_95o > 0:
-                if val_95o is not None:
-                    f.write(f"     95%平均字序: {val_95o:.1f} → 得分 {score_95o:.2f}/{weight_95o}\n")
-                else:
-                    f.write(f"     95%平均字序: 无数据 → 得分 {score_95o:.2f}/{weight_95o}\n")
-            if weight_99o > 0:
-                if val_99o is not None:
-                    f.write(f"     99%平均字序: {val_99o:.1f} → 得分 {score_99o:.2f}/{weight_99o}\n")
-                else:
-                    f.write(f"     99%平均字序: 无数据 → 得分 {score_99o:.2f}/{weight_99o}\n")
-            f.write(f"     小计: {order_total:.2f}\n\n")
-
-        # 字种维度
-        if WEIGHT_CHAR_TYPES > 0:
-            score_types, weight_types, val_types = score_details['char_types']
-            types_pct = WEIGHT_CHAR_TYPES / total_weight * 100 if total_weight > 0 else 0
-
-            f.write(f"   【字种维度】 (权重 {types_pct:.0f}%)\n")
-            f.write(f"     评分标准: 前{CHAR_TYPES_BASELINE}字外的字种数, 区间[{CHAR_TYPES_MIN}-{CHAR_TYPES_MAX}个]\n")
-            f.write(f"     前1500外字种: {val_types} 个 → 得分 {score_types:.2f}/{weight_types}\n")
-            f.write(f"     小计: {score_types:.2f}\n\n")
-
-        # 总分计算
-        raw_score = score_details['raw_score']
-        f.write(f"   【总分计算】\n")
-        f.write(f"     原始得分: {raw_score:.2f}\n")
-        f.write(f"     总权重: {total_weight:.2f}\n")
-        f.write(f"     归一化公式: (原始得分 / 总权重) × 100\n")
-        f.write(f"     最终难度: ({raw_score:.2f} / {total_weight:.2f}) × 100 = {difficulty_score:.1f} 分\n")
-        f.write(f"   ------------------------------------------------------------------\n")
-        f.write("\n")
-
-        # 写入详细字频表
-        f.write("【详细字频统计表】\n")
-        f.write("=" * 80 + "\n")
-        f.write(f"{'字':<5}{'次数':<10}{'比例(%)':<12}{'原次序':<10}\n")
-        f.write("=" * 80 + "\n")
-
-        # 写入在dict.yaml中的字
-        for char, count, order in chars_in_dict:
-            percentage = (count / total_chars) * 100
-            f.write(f"{char:<5}{count:<10}{percentage:<12.2f}{order:<10}\n")
-
-        # 写入不在dict.yaml中的字
-        if chars_not_in_dict:
-            f.write("\n" + "-" * 80 + "\n")
-            f.write("以下字符不在dict.yaml中（按出现次数降序排列）:\n")
-            f.write("-" * 80 + "\n")
-            for char, count in chars_not_in_dict:
-                percentage = (count / total_chars) * 100
-                f.write(f"{char:<5}{count:<10}{percentage:<12.2f}{'N/A':<10}\n")
-
-        # 强制刷新缓冲区，确保数据立即写入磁盘
-        f.flush()
-        os.fsync(f.fileno())
+                report.write(f"     95%平均字序: 无数据 → 得分 {score_95o:.2f}/{weight_95o}\n")
+        if weight_99o > 0:
+            if val_99o is not None:
+                report.write(f"     99%平均字序: {val_99o:.1f} → 得分 {score_99o:.2f}/{weight_99o}\n")
+            else:
+                report.write(f"     99%平均字序: 无数据 → 得分 {score_99o:.2f}/{weight_99o}\n")
+        report.write(f"     小计: {order_total:.2f}\n\n")
+
+    # 字种维度
+    if WEIGHT_CHAR_TYPES > 0:
+        score_types, weight_types, val_types = score_details['char_types']
+        types_pct = WEIGHT_CHAR_TYPES / total_weight * 100 if total_weight > 0 else 0
+
+        report.write(f"   【字种维度】 (权重 {types_pct:.0f}%)\n")
+        report.write(f"     评分标准: 前{CHAR_TYPES_BASELINE}字外的字种数, 区间[{CHAR_TYPES_MIN}-{CHAR_TYPES_MAX}个]\n")
+        report.write(f"     前1500外字种: {val_types} 个 → 得分 {score_types:.2f}/{weight_types}\n")
+        report.write(f"     小计: {score_types:.2f}\n\n")
+
+    # 总分计算
+    raw_score = score_details['raw_score']
+    report.write(f"   【总分计算】\n")
+    report.write(f"     原始得分: {raw_score:.2f}\n")
+    report.write(f"     总权重: {total_weight:.2f}\n")
+    report.write(f"     归一化公式: (原始得分 / 总权重) × 100\n")
+    report.write(f"     最终难度: ({raw_score:.2f} / {total_weight:.2f}) × 100 = {difficulty_score:.1f} 分\n")
+    report.write(f"   ------------------------------------------------------------------\n")
+    report.write("\n")
+
+    # 写入详细字频表
+    report.write("【详细字频统计表】\n")
+    report.write(SEP_EQ + "\n")
+    report.write(f"{'字':<5}{'次数':<10}{'比例(%)':<12}{'原次序':<10}\n")
+    report.write(SEP_EQ + "\n")
+
+    # 【性能优化】行模板预先绑定为format方法，writelines在C层逐行写入StringIO
+    format_detail_row = "{:<5}{:<10}{:<12.2f}{:<10}\n".format
+
+    # 写入在dict.yaml中的字
+    report.writelines(
+        format_detail_row(char, count, (count / total_chars) * 100, order)
+        for char, count, order in chars_in_dict
+    )
+
+    # 写入不在dict.yaml中的字
+    if chars_not_in_dict:
+        report.write("\n" + SEP_DASH + "\n")
+        report.write("以下字符不在dict.yaml中（按出现次数降序排列）:\n")
+        report.write(SEP_DASH + "\n")
+        report.writelines(
+            format_detail_row(char, count, (count / total_chars) * 100, 'N/A')
+            for char, count in chars_not_in_dict
+        )
+
+    write_report_file(output_file, report.getvalue())
 
     print(f"\n统计完成！结果已保存到: {output_file}")
 
     # 显示核心评估指标
-    print("\n" + "=" * 70)
-    print("【核心评估指标】")
-    print("=" * 70)
-    print(f"文件: {base_filename}")
-    print(f"书籍难度: {stars}  ({difficulty_score:.1f}/100)")
-    print(f"字种数: {len(char_counter)} 个（前1500内: {len(char_counter) - extra_char_types}，前1500外: {extra_char_types}）")
-    print(f"生僻字: {rare_analysis['rare_type_count']} 个（{rare_analysis['rare_type_ratio']*100:.1f}%）")
-    print(f"\n覆盖率分析:")
-    print(f"  前500字:  {coverage_stats[500]['coverage']:.1f}%")
-    print(f"  前1000字: {coverage_stats[1000]['coverage']:.1f}%")
-    print(f"  前1500字: {coverage_stats[1500]['coverage']:.1f}%")
-
-    # 找出95%和99%的数据
-    chars_95, chars_99 = 0, 0
-    for target_pct, char_count, _ in cumulative_coverage:
-        if target_pct == 95:
-            chars_95 = char_count
-        if target_pct == 99:
-            chars_99 = char_count
-
-    print(f"\n累积覆盖:")
-    print(f"  95%: {chars_95}个字", end="")
-    if avg_order_95:
-        print(f" (平均字序 {avg_order_95:.0f})")
-    else:
-        print()
-    print(f"  99%: {chars_99}个字", end="")
-    if avg_order_99:
-        print(f" (平均字序 {avg_order_99:.0f})")
-    else:
-        print()
-
-    print("\n" + "=" * 70)
+    # 【性能优化】整块拼成一个字符串，一次print输出，不再逐行写控制台
+    order_95_note = f" (平均字序 {avg_order_95:.0f})" if avg_order_95 else ""
+    order_99_note = f" (平均字序 {avg_order_99:.0f})" if avg_order_99 else ""
+    print(
+        f"\n{'=' * 70}\n"
+        f"【核心评估指标】\n"
+        f"{'=' * 70}\n"
+        f"文件: {base_filename}\n"
+        f"书籍难度: {stars}  ({difficulty_score:.1f}/100)\n"
+        f"字种数: {char_type_count} 个（前1500内: {char_types_in_ref}，前1500外: {extra_char_types}）\n"
+        f"生僻字: {rare_analysis['rare_type_count']} 个（{rare_analysis['rare_type_ratio']*100:.1f}%）\n"
+        f"\n覆盖率分析:\n"
+        f"  前500字:  {coverage_500:.1f}%\n"
+        f"  前1000字: {coverage_1000:.1f}%\n"
+        f"  前1500字: {coverage_1500:.1f}%\n"
+        f"\n累积覆盖:\n"
+        f"  95%: {chars_95}个字{order_95_note}\n"
+        f"  99%: {chars_99}个字{order_99_note}\n"
+        f"\n{'=' * 70}"
+    )
 
     # 数据库上传（可选功能）
     upload_success = False
     db_prepared_data = None
     db_is_update = False
 
-    if DB_UPLOAD_AVAILABLE:
+    # 【批量优化】批量模式只复用调用方建立的那一个连接；
+    # 调用方没有连上数据库时直接跳过，不再每本书各自读配置、尝试新建连接
+    # （并行统计的工作进程没有连接，但带有existing_books缓存，只准备数据）
+    if DB_UPLOAD_AVAILABLE and (db_conn is not None or existing_books is not None or not batch_mode):
         try:
+            from db_uploader import handle_database_upload
             if batch_mode:
                 # 【批量优化】批量模式：只准备数据，不执行SQL
                 success, returned_conn, prepared_data, is_update = handle_database_upload(
@@ -2533,52 +2934,77 @@ def process_file(selected_file, batch_mode=False, db_conn=None, db_config=None,
                     db_conn = returned_conn
 
             # 返回数据库连接和准备好的数据
-            return {
-                'filename': base_filename,
-                'total_chars': total_chars,
-                'char_type_count': len(char_counter),
-                'extra_char_types': extra_char_types,
-                'rare_type_count': rare_analysis['rare_type_count'],
-                'rare_type_ratio': rare_analysis['rare_type_ratio'],
-                'coverage_500': coverage_stats[500]['coverage'],
-                'coverage_1000': coverage_stats[1000]['coverage'],
-                'coverage_1500': coverage_stats[1500]['coverage'],
-                'chars_95': chars_95,
-                'chars_99': chars_99,
-                'avg_order_95': avg_order_95,
-                'avg_order_99': avg_order_99,
-                'difficulty_score': difficulty_score,
-                'stars': stars,
-                'tool_version': TOOL_VERSION,
-                'db_conn': db_conn,
-                'db_config': db_config,
-                'upload_success': upload_success,
-                'db_prepared_data': db_prepared_data,  # 【批量优化】准备好的数据
-                'db_is_update': db_is_update  # 【批量优化】是否更新操作
-            }
+            return BookResult(
+                filename=base_filename,
+                total_chars=total_chars,
+                char_type_count=char_type_count,
+                extra_char_types=extra_char_types,
+                rare_type_count=rare_analysis['rare_type_count'],
+                rare_type_ratio=rare_analysis['rare_type_ratio'],
+                coverage_500=coverage_500,
+                coverage_1000=coverage_1000,
+                coverage_1500=coverage_1500,
+                chars_95=chars_95,
+                chars_99=chars_99,
+                avg_order_95=avg_order_95,
+                avg_order_99=avg_order_99,
+                difficulty_score=difficulty_score,
+                stars=stars,
+                tool_version=TOOL_VERSION,
+                upload_success=upload_success,
+                db_conn=db_conn,
+                db_config=db_config,
+                db_prepared_data=db_prepared_data,  # 【批量优化】准备好的数据
+                db_is_update=db_is_update  # 【批量优化】是否更新操作
+            )
         except Exception as e:
             print(f"\n数据库上传出错（已跳过）: {e}")
 
     # 返回统计结果用于汇总报告
-    return {
-        'filename': base_filename,
-        'total_chars': total_chars,
-        'char_type_count': len(char_counter),
-        'extra_char_types': extra_char_types,  # 超出前1500的字种数
-        'rare_type_count': rare_analysis['rare_type_count'],
-        'rare_type_ratio': rare_analysis['rare_type_ratio'],
-        'coverage_500': coverage_stats[500]['coverage'],
-        'coverage_1000': coverage_stats[1000]['coverage'],
-        'coverage_1500': coverage_stats[1500]['coverage'],
-        'chars_95': chars_95,
-        'chars_99': chars_99,
-        'avg_order_95': avg_order_95,
-        'avg_order_99': avg_order_99,
-        'difficulty_score': difficulty_score,
-        'stars': stars,
-        'tool_version': TOOL_VERSION,
-        'upload_success': upload_success
-    }
+    return BookResult(
+        filename=base_filename,
+        total_chars=total_chars,
+        char_type_count=char_type_count,
+        extra_char_types=extra_char_types,  # 超出前1500的字种数
+        rare_type_count=rare_analysis['rare_type_count'],
+        rare_type_ratio=rare_analysis['rare_type_ratio'],
+        coverage_500=coverage_500,
+        coverage_1000=coverage_1000,
+        coverage_1500=coverage_1500,
+        chars_95=chars_95,
+        chars_99=chars_99,
+        avg_order_95=avg_order_95,
+        avg_order_99=avg_order_99,
+        difficulty_score=difficulty_score,
+        stars=stars,
+        tool_version=TOOL_VERSION,
+        upload_success=upload_success
+    )
+
+
+# 批量统计工作进程内的共享参数（由 _init_batch_worker 设置）
+_batch_worker_kwargs = None
+
+
+def _init_batch_worker(kwargs):
+    """批量统计工作进程初始化：保存共享参考数据，每个进程只传一次"""
+    global _batch_worker_kwargs
+    _batch_worker_kwargs = kwargs
+
+
+def _process_file_in_worker(file_path):
+    """
+    在工作进程中统计一本书
+
+    控制台输出先收集起来随结果一起返回，由主进程按书的顺序打印，多本书的输出不会交错。
+
+    Returns:
+        tuple: (控制台输出, BookResult或None)
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = process_file(file_path, batch_mode=True, **_batch_worker_kwargs)
+    return output.getvalue(), result
 
 
 def generate_summary_report(results):
@@ -2586,68 +3012,77 @@ def generate_summary_report(results):
     output_file = os.path.join(OUTPUT_FOLDER, "【汇总报告】所有书籍难度对比.txt")
 
     # 按难度分数排序
-    results_sorted = sorted(results, key=lambda x: x['difficulty_score'])
-
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("=" * 80 + "\n")
-        f.write("【所有书籍难度汇总报告】\n")
-        f.write("=" * 80 + "\n\n")
-        f.write(f"统计时间: {__import__('datetime').datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"统计书籍数: {len(results)} 本\n")
-        f.write("=" * 80 + "\n\n")
-
-        # 按难度排序的表格
-        f.write("【按难度排序】\n")
-        f.write("-" * 80 + "\n")
-        f.write(f"{'排名':<6}{'书名':<30}{'难度':<8}{'分数':<10}{'字种数':<10}{'生僻字':<10}\n")
-        f.write("-" * 80 + "\n")
-
-        for idx, r in enumerate(results_sorted, start=1):
-            # 截断过长的文件名
-            filename = r['filename'][:28] + '..' if len(r['filename']) > 30 else r['filename']
-            f.write(f"{idx:<6}{filename:<30}{r['stars']:<8}{r['difficulty_score']:<10.1f}"
-                   f"{r['char_type_count']:<10}{r['rare_type_count']:<10}\n")
-
-        f.write("\n" + "=" * 80 + "\n\n")
-
-        # 详细对比表
-        f.write("【详细数据对比】\n")
-        f.write("-" * 80 + "\n")
-
-        for r in results_sorted:
-            f.write(f"\n📖 {r['filename']}\n")
-            f.write(f"   难度: {r['stars']}  ({r['difficulty_score']:.1f}/100)\n")
-            f.write(f"   字种数: {r['char_type_count']} 个（前1500内: {r['char_type_count'] - r['extra_char_types']}，前1500外: {r['extra_char_types']}）\n")
-            f.write(f"   生僻字: {r['rare_type_count']} 个 ({r['rare_type_ratio']*100:.1f}%)\n")
-            f.write(f"   覆盖率: 前500字={r['coverage_500']:.1f}% | "
-                   f"前1000字={r['coverage_1000']:.1f}% | "
-                   f"前1500字={r['coverage_1500']:.1f}%\n")
-            f.write(f"   累积覆盖: 95%需{r['chars_95']}字 | 99%需{r['chars_99']}字\n")
-            if r['avg_order_95'] and r['avg_order_99']:
-                f.write(f"   平均字序: 95%={r['avg_order_95']:.0f} | 99%={r['avg_order_99']:.0f}\n")
-            f.write("\n")
-
-        f.write("=" * 80 + "\n\n")
-
-        # 统计分析
-        f.write("【统计分析】\n")
-        f.write("-" * 80 + "\n")
-
-        scores = [r['difficulty_score'] for r in results]
-        f.write(f"平均难度: {sum(scores)/len(scores):.1f}分\n")
-        f.write(f"最简单: {results_sorted[0]['filename']} ({results_sorted[0]['difficulty_score']:.1f}分)\n")
-        f.write(f"最困难: {results_sorted[-1]['filename']} ({results_sorted[-1]['difficulty_score']:.1f}分)\n")
-        f.write(f"难度跨度: {results_sorted[-1]['difficulty_score'] - results_sorted[0]['difficulty_score']:.1f}分\n")
-
-        f.write("\n" + "=" * 80 + "\n")
-        f.write("💡 说明：难度评分综合考虑字种数、覆盖率、字数需求、字序等多个维度\n")
-        f.write("=" * 80 + "\n")
+    results_sorted = sorted(results, key=attrgetter('difficulty_score'))
+
+    # 【性能优化】先在内存中拼好整份汇总报告，最后一次性写入文件
+    report = io.StringIO()
+
+    report.write(SEP_EQ + "\n")
+    report.write("【所有书籍难度汇总报告】\n")
+    report.write(SEP_EQ + "\n\n")
+    report.write(f"统计时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    report.write(f"统计书籍数: {len(results)} 本\n")
+    report.write(SEP_EQ + "\n\n")
+
+    # 按难度排序的表格
+    report.write("【按难度排序】\n")
+    report.write(SEP_DASH + "\n")
+    report.write(f"{'排名':<6}{'书名':<30}{'难度':<8}{'分数':<10}{'字种数':<10}{'生僻字':<10}\n")
+    report.write(SEP_DASH + "\n")
+
+    for idx, r in enumerate(results_sorted, start=1):
+        report.write(f"{idx:<6}{r.display_name:<30}{r.stars:<8}{r.difficulty_score:<10.1f}"
+                     f"{r.char_type_count:<10}{r.rare_type_count:<10}\n")
+
+    report.write("\n" + SEP_EQ + "\n\n")
+
+    # 详细对比表
+    report.write("【详细数据对比】\n")
+    report.write(SEP_DASH + "\n")
+
+    # 【性能优化】每本书的详情拼成一个f-string一次写入，不再逐行调用write
+    for r in results_sorted:
+        avg_order_line = (f"   平均字序: 95%={r.avg_order_95:.0f} | 99%={r.avg_order_99:.0f}\n"
+                          if r.avg_order_95 and r.avg_order_99 else "")
+        report.write(f"\n📖 {r.filename}\n"
+                     f"   难度: {r.stars}  ({r.difficulty_score:.1f}/100)\n"
+                     f"   字种数: {r.char_type_count} 个（前1500内: {r.char_type_count - r.extra_char_types}，前1500外: {r.extra_char_types}）\n"
+                     f"   生僻字: {r.rare_type_count} 个 ({r.rare_type_ratio*100:.1f}%)\n"
+                     f"   覆盖率: 前500字={r.coverage_500:.1f}% | "
+                     f"前1000字={r.coverage_1000:.1f}% | "
+                     f"前1500字={r.coverage_1500:.1f}%\n"
+                     f"   累积覆盖: 95%需{r.chars_95}字 | 99%需{r.chars_99}字\n"
+                     f"{avg_order_line}\n")
+
+    report.write(SEP_EQ + "\n\n")
+
+    # 统计分析
+    report.write("【统计分析】\n")
+    report.write(SEP_DASH + "\n")
+
+    # 最简单/最困难只需O(n)的min/max，不依赖上面排好序的列表
+    # （max遍历反序列表，同分时与稳定排序一样取排在最后的那本）
+    easiest = min(results, key=attrgetter('difficulty_score'))
+    hardest = max(reversed(results), key=attrgetter('difficulty_score'))
+    report.write(f"平均难度: {fmean(map(attrgetter('difficulty_score'), results)):.1f}分\n")
+    report.write(f"最简单: {easiest.filename} ({easiest.difficulty_score:.1f}分)\n")
+    report.write(f"最困难: {hardest.filename} ({hardest.difficulty_score:.1f}分)\n")
+    report.write(f"难度跨度: {hardest.difficulty_score - easiest.difficulty_score:.1f}分\n")
+
+    report.write("\n" + SEP_EQ + "\n")
+    report.write("💡 说明：难度评分综合考虑字种数、覆盖率、字数需求、字序等多个维度\n")
+    report.write(SEP_EQ + "\n")
+
+    write_report_file(output_file, report.getvalue())
 
     print(f"\n汇总报告已生成: {output_file}")
     print(f"共统计 {len(results)} 本书籍")
 
 
 if __name__ == '__main__':
+    # 打包成exe后，批量统计的工作进程需要由此识别并进入工作模式
+    import multiprocessing
+    multiprocessing.freeze_support()
     try:
         main()
     except Exception as e: